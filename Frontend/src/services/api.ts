@@ -17,6 +17,41 @@ const api = axios.create({
   },
 });
 
+// Read-your-writes: the API stamps write responses with this header; sending
+// it back keeps our reads on the primary database until replicas catch up.
+const LAST_WRITE_HEADER = 'X-DB-Last-Write';
+const LAST_WRITE_KEY = 'db_last_write';
+
+const loadLastWrite = (): string | null => {
+  try {
+    return typeof window !== 'undefined' ? window.sessionStorage.getItem(LAST_WRITE_KEY) : null;
+  } catch {
+    return null;
+  }
+};
+
+let lastWrite: string | null = loadLastWrite();
+
+api.interceptors.request.use((config) => {
+  if (lastWrite) {
+    config.headers.set(LAST_WRITE_HEADER, lastWrite);
+  }
+  return config;
+});
+
+api.interceptors.response.use((response) => {
+  const marker = response.headers[LAST_WRITE_HEADER.toLowerCase()];
+  if (typeof marker === 'string' && marker) {
+    lastWrite = marker;
+    try {
+      window.sessionStorage.setItem(LAST_WRITE_KEY, marker);
+    } catch {
+      // Storage unavailable (private mode); the in-memory copy still works
+    }
+  }
+  return response;
+});
+
 // Categories API
 export const categoriesApi = {
   getAll: async (): Promise<Category[]> => {
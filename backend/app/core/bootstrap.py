@@ -0,0 +1,26 @@
+"""
+Schema bootstrap, run once per deploy instead of at import time in every worker.
+
+    python migrate.py
+
+Applies pending migrations from app.migrations. On SQLite the API also runs
+them at startup, so a fresh checkout still works with `python main.py`; set
+DB_BOOTSTRAP_ON_STARTUP to force it on or off for any database.
+"""
+import os
+
+from app.core.database import DATABASE_URL, get_engine
+
+
+def bootstrap_on_startup() -> bool:
+    value = os.getenv("DB_BOOTSTRAP_ON_STARTUP")
+    if value is None:
+        return DATABASE_URL.startswith("sqlite")
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def bootstrap_database(engine=None) -> None:
+    """Bring the schema up to date by applying pending migrations."""
+    from app import migrations
+
+    migrations.upgrade(engine or get_engine())
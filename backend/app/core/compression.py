@@ -0,0 +1,247 @@
+"""
+Content-Encoding negotiation, compression and the response compression middleware.
+
+Catalog bodies are compressed ahead of time by app.services.materialized and
+arrive here already encoded. Every other JSON/text response at or above
+COMPRESSION_MIN_SIZE is compressed by CompressionMiddleware; single-chunk
+bodies go through a small LRU keyed on the body digest, so an endpoint that
+keeps returning the same bytes is only compressed once. Streaming responses
+(the lead export) are compressed chunk by chunk.
+
+brotli is optional (pip install brotli); without it only gzip is offered.
+
+Configured via environment:
+    RESPONSE_GZIP_LEVEL          - gzip level for cached bodies (default 9)
+    RESPONSE_BROTLI_QUALITY      - brotli quality for cached bodies (default 11)
+    COMPRESSION_MIN_SIZE         - smallest body worth compressing, in bytes (default 500)
+    COMPRESSION_GZIP_LEVEL       - gzip level for on-the-fly responses (default 6)
+    COMPRESSION_BROTLI_QUALITY   - brotli quality for on-the-fly responses (default 5)
+    COMPRESSION_CACHE_BYTES      - memory for recently compressed bodies (default 16 MB)
+"""
+import gzip
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "11"))
+
+MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+DYNAMIC_LEVELS = {
+    "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    "br": int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5")),
+}
+CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "application/xml",
+)
+
+# Server preference, best first
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(
+    accept_encoding: Optional[str],
+    available: Sequence[str] = SUPPORTED_ENCODINGS,
+) -> Optional[str]:
+    """Pick the best encoding the client accepts, or None for identity."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip()] = q
+    wildcard = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY if level is None else level)
+    if encoding == "gzip":
+        # mtime=0 keeps the output identical for identical input
+        return gzip.compress(body, compresslevel=GZIP_LEVEL if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return (
+        media_type.startswith("text/")
+        or media_type in _COMPRESSIBLE_TYPES
+        or media_type.endswith(("+json", "+xml"))
+    )
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed on (body digest, encoding), bounded in bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[bytes, str], bytes]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def get_or_compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if compressed is None:
+            compressed = compress(body, encoding, DYNAMIC_LEVELS[encoding])
+            with self._lock:
+                self.misses += 1
+                if len(compressed) <= self.max_bytes and key not in self._entries:
+                    self._entries[key] = compressed
+                    self._size += len(compressed)
+                    while self._size > self.max_bytes:
+                        _, evicted = self._entries.popitem(last=False)
+                        self._size -= len(evicted)
+        self.bytes_in += len(body)
+        self.bytes_out += min(len(compressed), len(body))
+        return compressed
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "cached_bytes": self._size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+        }
+
+
+compressed_bodies = CompressedBodyCache(CACHE_BYTES)
+
+
+class _StreamCompressor:
+    """Incremental encoder that flushes after every chunk so streams stay live."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=DYNAMIC_LEVELS["br"])
+        else:
+            self._gz = zlib.compressobj(DYNAMIC_LEVELS["gzip"], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._gz.flush()
+
+
+class CompressionMiddleware:
+    """Compress JSON/text responses with the client's preferred encoding."""
+
+    def __init__(self, app: ASGIApp, minimum_size: int = MIN_SIZE, cache: CompressedBodyCache = compressed_bodies):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(self, encoding, send))
+
+
+class _CompressingSend:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Optional[Message] = None
+        self.stream: Optional[_StreamCompressor] = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        if self.stream is not None:
+            body = self.stream.chunk(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if not more_body:
+                body += self.stream.finish()
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        eligible = (
+            200 <= start["status"] < 300
+            and start["status"] != 204
+            and "content-encoding" not in headers
+            and is_compressible(headers.get("content-type", ""))
+        )
+        if not eligible or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            self.stream = _StreamCompressor(self.encoding)
+            del headers["content-length"]
+            headers["Content-Encoding"] = self.encoding
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": self.stream.chunk(body), "more_body": True})
+            return
+
+        compressed = self.middleware.cache.get_or_compress(body, self.encoding)
+        if len(compressed) < len(body):
+            body = compressed
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+        self.passthrough = True
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": False})
@@ -3,6 +3,9 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import sqlite3
 import os
+import threading
+
+from app.core.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_pool, pool_options
 
 # Load environment variables
 from dotenv import load_dotenv
@@ -10,33 +13,137 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
-# Configure engine based on database type
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        echo=False,  # Set to True for SQL debugging
-        pool_pre_ping=True,  # Verify connections before using them
-        pool_recycle=3600,  # Recycle connections every hour
-    )
+def set_sqlite_pragma(dbapi_conn, connection_record):
+    """Configure SQLite pragmas for better reliability with hot reload."""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")  # Use Write-Ahead Logging for better concurrency
+    cursor.execute("PRAGMA synchronous=NORMAL")  # Balance between safety and performance
+    cursor.execute("PRAGMA foreign_keys=ON")  # Enable foreign key constraints
+    cursor.close()
+
+_engine_lock = threading.Lock()
+
+
+def _create_engine(url=DATABASE_URL, connect_args=None):
+    # Configure engine based on database type
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            echo=False,  # Set to True for SQL debugging
+            pool_pre_ping=True,  # Verify connections before using them
+            pool_recycle=3600,  # Recycle connections every hour
+        )
+
+        # Add SQLite pragma configurations for reliability
+        event.listen(engine, "connect", set_sqlite_pragma)
+    else:
+        # For PostgreSQL and other databases; pool sizing and pre-ping come from DB_POOL_* settings
+        engine = create_engine(
+            url,
+            connect_args=connect_args or {},
+            echo=False,  # Set to True for SQL debugging
+            poolclass=InstrumentedQueuePool,
+            **pool_options(),
+        )
+    return engine
 
-    # Add SQLite pragma configurations for reliability
-    @event.listens_for(engine, "connect")
-    def set_sqlite_pragma(dbapi_conn, connection_record):
-        """Configure SQLite pragmas for better reliability with hot reload."""
-        cursor = dbapi_conn.cursor()
-        cursor.execute("PRAGMA journal_mode=WAL")  # Use Write-Ahead Logging for better concurrency
-        cursor.execute("PRAGMA synchronous=NORMAL")  # Balance between safety and performance
-        cursor.execute("PRAGMA foreign_keys=ON")  # Enable foreign key constraints
-        cursor.close()
-else:
-    # For PostgreSQL and other databases
-    engine = create_engine(
-        DATABASE_URL,
-        echo=False,  # Set to True for SQL debugging
-        pool_pre_ping=True,  # Verify connections before using them
-        pool_recycle=3600,  # Recycle connections every hour
-    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_engine():
+    """
+    Return the engine, creating it on first use. Importing this module does
+    not load a DBAPI driver or touch the database, so workers start fast.
+    """
+    global engine, pool_metrics
+    if "engine" not in globals():
+        with _engine_lock:
+            if "engine" not in globals():
+                created = _create_engine()
+                pool_metrics = instrument_pool(created)
+                engine = created
+    return engine
+
+
+class _LazySessionmaker(sessionmaker):
+    """sessionmaker that binds to its engine when the first session is made."""
+
+    def __init__(self, engine_factory, **kw):
+        super().__init__(**kw)
+        self._engine_factory = engine_factory
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self._engine_factory())
+        return super().__call__(**local_kw)
+
+
+SessionLocal = _LazySessionmaker(get_engine, autocommit=False, autoflush=False)
 Base = declarative_base()
+
+# Optional async stack (DATABASE_ASYNC=true): asyncpg for PostgreSQL,
+# aiosqlite for SQLite. Requires `pip install asyncpg` or `pip install aiosqlite`.
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def to_async_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its async counterpart."""
+    scheme, sep, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def get_async_engine():
+    """Return the async engine (None unless DATABASE_ASYNC), creating it on first use."""
+    global async_engine, async_pool_metrics
+    if "async_engine" not in globals():
+        with _engine_lock:
+            if "async_engine" not in globals():
+                created, metrics = None, None
+                if DATABASE_ASYNC:
+                    from sqlalchemy.ext.asyncio import create_async_engine
+
+                    async_url = os.getenv("DATABASE_ASYNC_URL") or to_async_url(DATABASE_URL)
+                    if async_url.startswith("sqlite"):
+                        created = create_async_engine(async_url, echo=False)
+                        event.listen(created.sync_engine, "connect", set_sqlite_pragma)
+                    else:
+                        created = create_async_engine(
+                            async_url,
+                            echo=False,
+                            poolclass=InstrumentedAsyncQueuePool,
+                            **pool_options(),
+                        )
+                    metrics = instrument_pool(created)
+                async_pool_metrics = metrics
+                async_engine = created
+    return async_engine
+
+
+AsyncSessionLocal = None
+
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    AsyncSessionLocal = _LazySessionmaker(
+        get_async_engine,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+def __getattr__(name):
+    # engine, pool_metrics and their async counterparts are created on first access
+    if name in ("engine", "pool_metrics"):
+        get_engine()
+        return globals()[name]
+    if name in ("async_engine", "async_pool_metrics"):
+        get_async_engine()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,7 @@
-from app.core.database import SessionLocal
+from fastapi import Request
+
+from app.core.database import AsyncSessionLocal, SessionLocal
+from app.core.replicas import last_write, read_session
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +9,17 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes; served by a read replica when one is usable."""
+    db = read_session(last_write(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
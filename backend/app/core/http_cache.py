@@ -0,0 +1,90 @@
+"""
+Conditional GET and Cache-Control for catalog reads.
+
+Every catalog response is derived from the current CatalogSnapshot, so the
+snapshot's content fingerprint is a validator for all of them. A request whose
+If-None-Match (or, failing that, If-Modified-Since) still matches gets an
+empty 304 before anything is serialized.
+
+Each route has a named Cache-Control policy; override one with an environment
+variable named after it, e.g.
+    CACHE_CONTROL_PRODUCT_DETAIL="public, max-age=300, stale-while-revalidate=86400"
+"""
+import os
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request, Response, status
+
+# Route policy name -> default Cache-Control header
+DEFAULT_CACHE_CONTROL: Dict[str, str] = {
+    "categories": "public, max-age=300, stale-while-revalidate=86400",
+    "category_detail": "public, max-age=300, stale-while-revalidate=86400",
+    "product_list": "public, max-age=60, stale-while-revalidate=86400",
+    "product_detail": "public, max-age=300, stale-while-revalidate=86400",
+    "category_products": "public, max-age=300, stale-while-revalidate=86400",
+    "related_products": "public, max-age=300, stale-while-revalidate=86400",
+    "search": "public, max-age=60, stale-while-revalidate=600",
+    "autocomplete": "public, max-age=300, stale-while-revalidate=3600",
+}
+
+CACHE_CONTROL: Dict[str, str] = {
+    name: os.getenv(f"CACHE_CONTROL_{name.upper()}", default)
+    for name, default in DEFAULT_CACHE_CONTROL.items()
+}
+
+
+def catalog_etag(snapshot) -> str:
+    # Weak, so the same validator still holds for gzip/brotli encoded bodies
+    return f'W/"{snapshot.fingerprint}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:]
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in header.split(",")
+    )
+
+
+def _not_modified_since(header: str, snapshot) -> bool:
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since is None or since.tzinfo is None:
+        return False
+    return snapshot.built_at.replace(microsecond=0) <= since
+
+
+def cache_headers(snapshot, policy: str) -> Dict[str, str]:
+    return {
+        "ETag": catalog_etag(snapshot),
+        "Last-Modified": format_datetime(snapshot.built_at, usegmt=True),
+        "Cache-Control": CACHE_CONTROL[policy],
+    }
+
+
+def conditional_response(
+    request: Request,
+    response: Response,
+    snapshot,
+    policy: str,
+) -> Optional[Response]:
+    """
+    Attach validators and Cache-Control to the response. Returns a 304 when
+    the client's copy is current, otherwise None and the route carries on.
+    """
+    headers = cache_headers(snapshot, policy)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, headers["ETag"])
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        fresh = if_modified_since is not None and _not_modified_since(if_modified_since, snapshot)
+    if fresh:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,68 @@
+"""
+Helpers shared by list endpoints for limit/cursor pagination and fields= projection.
+
+List endpoints keep returning a plain JSON array; the cursor for the next page
+travels in the X-Next-Cursor response header and is absent on the last page.
+"""
+import base64
+import json
+from typing import Any, Iterable, List, Optional, Type
+
+from fastapi import HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """Validate a comma-separated field list against a response schema."""
+    if not fields:
+        return None
+    selected = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    unknown = [f for f in selected if f not in schema.model_fields]
+    if unknown or not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(schema.model_fields)}"
+        )
+    return selected
+
+
+def encode_cursor(*values: Any) -> str:
+    """Pack keyset values into an opaque, URL-safe cursor."""
+    raw = json.dumps(jsonable_encoder(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Unpack a cursor produced by encode_cursor, rejecting anything malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+def list_response(
+    response: Response,
+    items: Iterable[Any],
+    next_cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+):
+    """
+    Return a page of items. Projected pages bypass response_model validation,
+    since they deliberately omit required fields.
+    """
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+    if fields is None:
+        response.headers.update(headers)
+        return items
+    projected = JSONResponse(content=jsonable_encoder(list(items)), headers=headers)
+    # Keep headers the route already set, such as cache validators
+    projected.headers.update(response.headers)
+    return projected
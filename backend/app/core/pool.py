@@ -0,0 +1,184 @@
+"""
+Connection pool tuning and instrumentation.
+
+Pool behaviour is configured from the environment:
+    DB_POOL_SIZE                  - persistent connections per worker (default 5)
+    DB_MAX_OVERFLOW               - extra connections allowed under load (default 10)
+    DB_POOL_TIMEOUT               - seconds to wait for a free connection (default 30)
+    DB_POOL_RECYCLE               - max connection age in seconds (default 3600)
+    DB_POOL_PRE_PING              - "always", "idle" or "off" (default "idle")
+    DB_POOL_PRE_PING_IDLE_SECONDS - with "idle", ping only connections idle this long (default 60)
+
+"always" pings on every checkout, an extra round trip per request; "idle" pings
+only connections that sat unused long enough to have been dropped by the
+server or a proxy, which is where stale connections actually come from.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Checkout latency histogram bucket upper bounds, in milliseconds
+LATENCY_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class PoolMetrics:
+    """Counters and a checkout latency histogram for one engine's pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.overflow_events = 0
+        self.invalidations = 0
+        self.pings = 0
+        self.latency_sum_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe_checkout(self, elapsed_ms: float, waited: bool, overflowed: bool) -> None:
+        with self._lock:
+            self.latency_sum_ms += elapsed_ms
+            self.latency_max_ms = max(self.latency_max_ms, elapsed_ms)
+            self.latency_buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if waited:
+                self.waits += 1
+            if overflowed:
+                self.overflow_events += 1
+
+    def snapshot(self, pool) -> Dict:
+        with self._lock:
+            observed = sum(self.latency_buckets)
+            histogram: List[Dict] = []
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS + ["+Inf"], self.latency_buckets):
+                cumulative += count
+                histogram.append({"le_ms": bound, "count": cumulative})
+            stats = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "waits": self.waits,
+                "timeouts": self.timeouts,
+                "overflow_events": self.overflow_events,
+                "invalidations": self.invalidations,
+                "pre_pings": self.pings,
+                "checkout_latency_ms": {
+                    "count": observed,
+                    "avg": self.latency_sum_ms / observed if observed else 0.0,
+                    "max": self.latency_max_ms,
+                    "histogram": histogram,
+                },
+            }
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return stats
+
+
+class _TimedCheckoutMixin:
+    """Times every checkout and records waits, overflow connections and timeouts."""
+
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        metrics = self.metrics
+        will_wait = self._pool.empty() and 0 <= self._max_overflow <= self._overflow
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            with metrics._lock:
+                metrics.timeouts += 1
+            raise
+        overflowed = self._overflow > overflow_before and self._overflow > 0
+        metrics.observe_checkout((time.perf_counter() - start) * 1000, will_wait, overflowed)
+        return conn
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep counting into the same metrics.
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_options() -> Dict:
+    """create_engine() keyword arguments for a pooled (non-SQLite) engine."""
+    strategy = os.getenv("DB_POOL_PRE_PING", "idle").strip().lower()
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "3600")),
+        "pool_pre_ping": strategy == "always",
+    }
+
+
+def instrument_pool(engine) -> PoolMetrics:
+    """Attach metrics and the idle pre-ping strategy to an engine's pool."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics = PoolMetrics()
+    sync_engine.pool.metrics = metrics
+
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_conn, connection_record):
+        with metrics._lock:
+            metrics.connects += 1
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_conn, connection_record):
+        connection_record.info["last_checkin"] = time.monotonic()
+        with metrics._lock:
+            metrics.checkins += 1
+
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_conn, connection_record, exception):
+        with metrics._lock:
+            metrics.invalidations += 1
+
+    idle_ping = os.getenv("DB_POOL_PRE_PING", "idle").strip().lower() == "idle"
+    idle_seconds = float(os.getenv("DB_POOL_PRE_PING_IDLE_SECONDS", "60"))
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_conn, connection_record, connection_proxy):
+        with metrics._lock:
+            metrics.checkouts += 1
+        if not idle_ping:
+            return
+        last_checkin = connection_record.info.get("last_checkin")
+        if last_checkin is None or time.monotonic() - last_checkin < idle_seconds:
+            return
+        with metrics._lock:
+            metrics.pings += 1
+        try:
+            cursor = dbapi_conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        except Exception:
+            # The pool discards this connection and retries with a fresh one.
+            raise exc.DisconnectionError()
+
+    return metrics
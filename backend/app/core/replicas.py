@@ -0,0 +1,285 @@
+"""
+Read replica routing.
+
+Read-only routes (product search, lead listing and lookup, the change feed,
+lead exports) take their session from get_read_db, which is served by a
+replica when one is healthy and caught up, and by the primary otherwise.
+Everything else, including the catalog snapshot loads that must see the
+write that triggered them, stays on the primary.
+
+Replicas are picked round-robin among the usable ones. A replica is usable
+when its last health check succeeded and its replication lag is within
+DATABASE_REPLICA_MAX_LAG_SECONDS. A background thread, started with the app,
+re-checks health and lag every DATABASE_REPLICA_CHECK_SECONDS; requests only
+read the last result and never wait on a replica. Until the first check
+completes, or if the last one is more than three intervals old, reads go to
+the primary. A replica that drops its connections is taken out of rotation
+until the next successful check.
+
+Read-your-writes: a successful write response (any method other than
+GET/HEAD/OPTIONS) carries an X-DB-Last-Write header with the time of the
+write, and the client echoes it back on later requests (see
+Frontend/src/services/api.ts). For the longest a usable replica can be
+behind (max lag plus one check interval) after that time, its reads go to
+the primary. A header rather than a cookie, so it works for the
+cross-origin frontend without credentialed CORS.
+
+A RoutingSession also sends anything it flushes or any INSERT/UPDATE/DELETE
+to the primary, and stays on the primary for the rest of the session.
+
+Configured via environment:
+    DATABASE_REPLICA_URLS             - comma-separated replica URLs (default: none)
+    DATABASE_REPLICA_MAX_LAG_SECONDS  - skip replicas further behind (default 5)
+    DATABASE_REPLICA_CHECK_SECONDS    - health/lag check interval (default 5)
+    DATABASE_REPLICA_CONNECT_TIMEOUT  - PostgreSQL connect timeout in seconds (default 3)
+
+The async stack (DATABASE_ASYNC) always reads from the primary.
+"""
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql.dml import UpdateBase
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import database
+from app.core.pool import instrument_pool
+
+logger = logging.getLogger(__name__)
+
+LAST_WRITE_HEADER = "X-DB-Last-Write"
+_SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Seconds since the last replayed transaction; 0 when everything received has
+# been replayed (an idle primary would otherwise look like growing lag).
+_PG_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """One replica's engine and its last observed health."""
+
+    def __init__(self, name: str, url: str, connect_timeout: int = 3):
+        self.name = name
+        self.url = url
+        self.connect_timeout = connect_timeout
+        self.healthy = False
+        self.lag = None
+        self.checked_at = 0.0
+        self.reads = 0
+        self.failures = 0
+        self._engine = None
+        self._engine_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    connect_args = {}
+                    if make_url(self.url).get_backend_name() == "postgresql":
+                        # A replica that stops answering must not stall its health check
+                        connect_args["connect_timeout"] = self.connect_timeout
+                    engine = database._create_engine(self.url, connect_args=connect_args)
+                    self.pool_metrics = instrument_pool(engine)
+                    event.listen(engine, "handle_error", self._on_error)
+                    self._engine = engine
+        return self._engine
+
+    def usable(self, max_lag: float, checked_since: float) -> bool:
+        return self.healthy and self.checked_at >= checked_since and self.lag is not None and self.lag <= max_lag
+
+    def check(self) -> None:
+        now = time.time()
+        try:
+            with self.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(conn.execute(_PG_LAG_SQL).scalar() or 0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception:
+            self.healthy = False
+            self.failures += 1
+            logger.warning("Read replica %s failed its health check", self.name, exc_info=True)
+        else:
+            self.healthy = True
+            self.lag = lag
+        self.checked_at = now
+
+    def _on_error(self, context) -> None:
+        if context.is_disconnect:
+            self.healthy = False
+            self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "url": make_url(self.url).render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "reads": self.reads,
+            "failures": self.failures,
+        }
+
+
+class ReplicaSet:
+    """Round-robin over the usable replicas, falling back to the primary."""
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag: float = 5.0,
+        check_interval: float = 5.0,
+        connect_timeout: int = 3,
+    ):
+        self.replicas = [Replica(f"replica-{i}", url, connect_timeout) for i, url in enumerate(urls, 1)]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+        self.fallbacks = 0
+        self.primary_after_write = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    @property
+    def read_your_writes_window(self) -> float:
+        """How long after a write a replica may still be missing it."""
+        return self.max_lag + self.check_interval
+
+    def start(self) -> None:
+        """Start the health check thread (idempotent)."""
+        if self._thread is not None or not self.replicas:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            for replica in self.replicas:
+                replica.check()
+            if self._stop.wait(self.check_interval):
+                return
+
+    def pick(self, last_write: Optional[float] = None):
+        """Engine of the next usable replica, or None to read from the primary."""
+        now = time.time()
+        if last_write is not None and now - last_write < self.read_your_writes_window:
+            self.primary_after_write += 1
+            return None
+        # Cached results only; a stale one means the checker is stuck or not running
+        checked_since = now - 3 * self.check_interval
+        usable = [r for r in self.replicas if r.usable(self.max_lag, checked_since)]
+        if not usable:
+            self.fallbacks += 1
+            return None
+        replica = usable[next(self._next) % len(usable)]
+        replica.reads += 1
+        return replica.engine
+
+    def pool_stats(self) -> Dict[str, dict]:
+        return {
+            replica.name: replica.pool_metrics.snapshot(replica.engine.pool)
+            for replica in self.replicas
+            if replica._engine is not None
+        }
+
+    def stats(self) -> dict:
+        return {
+            "replicas": {replica.name: replica.stats() for replica in self.replicas},
+            "max_lag_seconds": self.max_lag,
+            "primary_fallbacks": self.fallbacks,
+            "primary_after_write": self.primary_after_write,
+        }
+
+
+class RoutingSession(Session):
+    """
+    Reads go to one replica picked when the session first needs a connection;
+    flushes and DML go to the primary, and so does everything after them.
+    """
+
+    def __init__(self, replicas: "ReplicaSet", last_write: Optional[float] = None, **kw):
+        super().__init__(**kw)
+        self._replicas = replicas
+        self._last_write = last_write
+        self._read_bind = None
+        self._on_primary = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._on_primary or self._flushing or isinstance(clause, UpdateBase):
+            self._on_primary = True
+            return database.get_engine()
+        if self._read_bind is None:
+            self._read_bind = self._replicas.pick(self._last_write) or database.get_engine()
+        return self._read_bind
+
+
+replica_set = ReplicaSet(
+    [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()],
+    max_lag=float(os.getenv("DATABASE_REPLICA_MAX_LAG_SECONDS", "5")),
+    check_interval=float(os.getenv("DATABASE_REPLICA_CHECK_SECONDS", "5")),
+    connect_timeout=int(os.getenv("DATABASE_REPLICA_CONNECT_TIMEOUT", "3")),
+)
+
+ReadSessionLocal = sessionmaker(class_=RoutingSession, replicas=replica_set, autocommit=False, autoflush=False)
+
+
+def read_session(last_write: Optional[float] = None) -> Session:
+    """A session for read-only work: replica-routed when replicas are configured."""
+    if replica_set.enabled:
+        return ReadSessionLocal(last_write=last_write)
+    return database.SessionLocal()
+
+
+def last_write(request: Request) -> Optional[float]:
+    """Time of this client's last write, as echoed back in the read-your-writes header."""
+    try:
+        written = float(request.headers[LAST_WRITE_HEADER])
+    except (KeyError, ValueError):
+        return None
+    # A time in the future would pin the client to the primary; ignore it
+    if written > time.time() + replica_set.read_your_writes_window:
+        return None
+    return written
+
+
+class ReadYourWritesMiddleware:
+    """Stamps successful write responses with the read-your-writes header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in _SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_marker(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message)[LAST_WRITE_HEADER] = f"{time.time():.3f}"
+            await send(message)
+
+        await self.app(scope, receive, send_with_marker)
@@ -1,4 +1,5 @@
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import List
 
@@ -11,21 +12,46 @@ load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.database import Base, engine, SessionLocal
+from app.core import database
+from app.core.compression import CompressionMiddleware, compressed_bodies
+from app.core.bootstrap import bootstrap_database, bootstrap_on_startup
+from app.core.database import DATABASE_ASYNC
+from app.core.replicas import LAST_WRITE_HEADER, ReadYourWritesMiddleware, replica_set
 
-from app.models.category import Category
-from app.models.product import Product
-from app.models.lead import Lead
+from app.routes import categories, changes, products, leads
+from app.services.catalog import catalog_cache
+from app.services.catalog_sync import catalog_sync
+from app.services.lead_dedup import lead_dedup
+from app.services.lead_queue import lead_queue
+from app.services.materialized import response_store
 
-# Create all tables
-Base.metadata.create_all(bind=engine)
+# Note: Database seeding is handled by seed_data.py script
+# For production deployments, run: python migrate.py, then python seed_data.py
 
-from app.routes import categories, products, leads
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema creation is a deploy step; only local SQLite does it on startup
+    if bootstrap_on_startup():
+        bootstrap_database()
+    if lead_queue.enabled:
+        lead_queue.start()
+    if catalog_sync.enabled:
+        catalog_sync.start()
+    replica_set.start()
+    yield
+    replica_set.stop()
+    catalog_sync.stop()
+    # Drain queued leads before the worker exits
+    lead_queue.stop()
 
-# Note: Database seeding is handled by seed_data.py script
-# For production deployments, run: python seed_data.py
+app = FastAPI(title="CareSpace Enterprise API", version="1.0.0", lifespan=lifespan)
+
+# gzip/brotli for JSON and text responses (catalog bodies arrive pre-compressed)
+app.add_middleware(CompressionMiddleware)
 
-app = FastAPI(title="CareSpace Enterprise API", version="1.0.0")
+# Clients that just wrote read from the primary until replicas catch up
+if replica_set.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
 
 # Enable CORS for frontend
 app.add_middleware(
@@ -34,12 +60,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", LAST_WRITE_HEADER],
 )
 
-# Include routers
-app.include_router(categories.router)
-app.include_router(products.router)
-app.include_router(leads.router)
+# Include routers (async variants when DATABASE_ASYNC is enabled)
+if DATABASE_ASYNC:
+    from app.routes import async_api
+    app.include_router(async_api.categories_router)
+    app.include_router(async_api.products_router)
+    app.include_router(async_api.leads_router)
+else:
+    app.include_router(categories.router)
+    app.include_router(products.router)
+    app.include_router(leads.router)
+app.include_router(changes.router)
 
 @app.get("/")
 def root():
@@ -51,6 +85,7 @@ def root():
             "categories": "/api/categories",
             "products": "/api/products",
             "leads": "/api/leads",
+            "changes": "/api/changes",
             "docs": "/docs",
             "openapi": "/openapi.json"
         }
@@ -60,6 +95,24 @@ def health_check():
     """Health check endpoint for monitoring."""
     return {"status": "healthy"}
 
+@app.get("/metrics")
+def metrics():
+    """Runtime counters for the database pools and in-process caches."""
+    db_pool = {"primary": database.pool_metrics.snapshot(database.engine.pool)}
+    if database.async_engine is not None:
+        db_pool["async"] = database.async_pool_metrics.snapshot(database.async_engine.sync_engine.pool)
+    db_pool.update(replica_set.pool_stats())
+    return {
+        "db_pool": db_pool,
+        "replicas": replica_set.stats(),
+        "catalog": catalog_cache.stats(),
+        "catalog_sync": catalog_sync.stats(),
+        "responses": response_store.stats(),
+        "compression": compressed_bodies.stats(),
+        "lead_queue": lead_queue.stats(),
+        "lead_dedup": lead_dedup.stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
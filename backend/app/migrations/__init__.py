@@ -0,0 +1,260 @@
+"""
+Versioned schema migrations for SQLite and PostgreSQL.
+
+Each module in app/migrations/versions named mNNNN_<name>.py is one migration:
+its docstring describes it and upgrade(op) applies it through a
+MigrationContext. Applied versions are recorded in the schema_migrations
+table, so every deploy runs only what is pending:
+
+    python migrate.py             # apply pending migrations
+    python migrate.py --dry-run   # print the SQL without running it
+    python migrate.py --status    # list applied and pending versions
+
+Operations inspect the live schema first, so databases that were upgraded by
+hand or by the old migrate_add_* scripts are brought in line without errors.
+On PostgreSQL, indexes are built with CREATE INDEX CONCURRENTLY after the
+migration's transaction commits, so writes to the table are never blocked; a
+build that failed halfway (an INVALID index) is dropped and rebuilt on the
+next run.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.database import Base, get_engine
+# Register every model on Base.metadata for the baseline migration
+from app.models import category, change, lead, product  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+_MODULE_RE = re.compile(r"^m(\d{4})_\w+$")
+
+# Arbitrary key for pg_advisory_lock, so concurrent deploys run migrations one at a time
+_PG_LOCK_KEY = 72_310_001
+
+_version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration:
+    def __init__(self, version: int, name: str, description: str, upgrade: Callable):
+        self.version = version
+        self.name = name
+        self.description = description
+        self.upgrade = upgrade
+
+    def __repr__(self):
+        return f"<Migration {self.version:04d} {self.name}>"
+
+
+def discover() -> List[Migration]:
+    """All migrations in app/migrations/versions, in version order."""
+    from app.migrations import versions
+
+    migrations = []
+    for module_info in pkgutil.iter_modules(versions.__path__):
+        match = _MODULE_RE.match(module_info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{versions.__name__}.{module_info.name}")
+        description = (module.__doc__ or module_info.name).strip().splitlines()[0]
+        migrations.append(Migration(int(match.group(1)), module_info.name, description, module.upgrade))
+    migrations.sort(key=lambda m: m.version)
+    versions_seen = [m.version for m in migrations]
+    if len(set(versions_seen)) != len(versions_seen):
+        raise RuntimeError(f"Duplicate migration versions: {versions_seen}")
+    return migrations
+
+
+class MigrationContext:
+    """
+    The `op` handed to each migration's upgrade(). Statements run on the
+    migration's transaction, except PostgreSQL concurrent index builds, which
+    are deferred until that transaction has committed.
+    """
+
+    def __init__(self, connection: Connection, dry_run: bool, new_tables: Set[str]):
+        self.connection = connection
+        self.dry_run = dry_run
+        self.dialect = connection.dialect.name
+        self.deferred: List[str] = []
+        # Tables created (or, in a dry run, to be created) from the models in
+        # this run; they already have every column and declared index.
+        self._new_tables = new_tables
+
+    def log(self, message: str) -> None:
+        logger.info("    %s", message)
+
+    def execute(self, sql: str, params=None) -> None:
+        self.log(_one_line(sql))
+        if not self.dry_run:
+            self.connection.execute(text(sql), params or {})
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.connection).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(c["name"] == column for c in inspect(self.connection).get_columns(table))
+
+    def create_all(self) -> None:
+        """Create model tables that do not exist yet, with their indexes."""
+        existing = set(inspect(self.connection).get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name in existing:
+                continue
+            self._new_tables.add(table.name)
+            self.log(f"create table {table.name}")
+            if not self.dry_run:
+                table.create(bind=self.connection)
+
+    def add_column(self, table: str, column: str, ddl: str) -> None:
+        if table in self._new_tables or self.has_column(table, column):
+            return
+        self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+    def create_index(
+        self,
+        name: str,
+        table: str,
+        expression: str,
+        unique: bool = False,
+        using: Optional[str] = None,
+    ) -> None:
+        """Create an index if missing; online (CONCURRENTLY) on PostgreSQL."""
+        if table in self._new_tables and _declared_index(table, name):
+            return
+        unique_sql = "UNIQUE " if unique else ""
+        using_sql = f" USING {using}" if using else ""
+
+        if self.dialect != "postgresql":
+            exists = self.connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": name}
+            ).first() if self.dialect == "sqlite" else None
+            if not exists:
+                self.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {name} ON {table}{using_sql} ({expression})")
+            return
+
+        valid = self.connection.execute(
+            text(
+                "SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+                "WHERE c.relname = :name"
+            ),
+            {"name": name},
+        ).scalar()
+        if valid:
+            return
+        if valid is False:
+            # Left behind by an interrupted CONCURRENTLY build
+            self._defer(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        self._defer(
+            f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table}{using_sql} ({expression})"
+        )
+
+    def drop_index(self, name: str) -> None:
+        """Drop an index if present; online (CONCURRENTLY) on PostgreSQL."""
+        if self.dialect == "postgresql":
+            exists = self.connection.execute(
+                text("SELECT 1 FROM pg_class WHERE relname = :name AND relkind = 'i'"), {"name": name}
+            ).first()
+            if exists:
+                self._defer(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            return
+        if self.dialect == "sqlite":
+            exists = self.connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {"name": name}
+            ).first()
+            if not exists:
+                return
+        self.execute(f"DROP INDEX IF EXISTS {name}")
+
+    def _defer(self, sql: str) -> None:
+        self.log(f"{_one_line(sql)}  -- after commit")
+        self.deferred.append(sql)
+
+
+def _declared_index(table: str, name: str) -> bool:
+    model_table = Base.metadata.tables.get(table)
+    return model_table is not None and any(index.name == name for index in model_table.indexes)
+
+
+def _one_line(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def applied_versions(engine: Engine) -> Set[int]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_migrations.name):
+            return set()
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def pending(engine: Optional[Engine] = None) -> List[Migration]:
+    engine = engine or get_engine()
+    done = applied_versions(engine)
+    return [m for m in discover() if m.version not in done]
+
+
+def upgrade(engine: Optional[Engine] = None, dry_run: bool = False) -> List[Migration]:
+    """Apply every pending migration in order; returns the ones applied (or planned)."""
+    engine = engine or get_engine()
+    with engine.connect() as lock_conn:
+        if engine.dialect.name == "postgresql" and not dry_run:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+        try:
+            return _upgrade_locked(engine, dry_run)
+        finally:
+            if engine.dialect.name == "postgresql" and not dry_run:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+
+
+def _upgrade_locked(engine: Engine, dry_run: bool) -> List[Migration]:
+    if not dry_run:
+        _version_metadata.create_all(bind=engine)
+    todo = pending(engine)
+    new_tables: Set[str] = set()
+    for migration in todo:
+        logger.info("%s %04d %s: %s", "Would apply" if dry_run else "Applying",
+                    migration.version, migration.name, migration.description)
+        with engine.connect() as conn:
+            trans = conn.begin()
+            try:
+                op = MigrationContext(conn, dry_run, new_tables)
+                migration.upgrade(op)
+            except Exception:
+                trans.rollback()
+                raise
+            if dry_run:
+                trans.rollback()
+                continue
+            trans.commit()
+        _run_deferred(engine, op.deferred)
+        with engine.begin() as conn:
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version,
+                name=migration.name,
+                applied_at=datetime.utcnow(),
+            ))
+    return todo
+
+
+def _run_deferred(engine: Engine, statements: Iterable[str]) -> None:
+    statements = list(statements)
+    if not statements:
+        return
+    with engine.connect() as conn:
+        # CONCURRENTLY cannot run inside a transaction block
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for sql in statements:
+            conn.execute(text(sql))
@@ -0,0 +1,5 @@
+"""Create any missing tables from the models."""
+
+
+def upgrade(op):
+    op.create_all()
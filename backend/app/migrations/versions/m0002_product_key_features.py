@@ -0,0 +1,5 @@
+"""Add key_features to products."""
+
+
+def upgrade(op):
+    op.add_column("products", "key_features", "TEXT")
@@ -0,0 +1,6 @@
+"""Add seo_tags and mumbai_keywords to products."""
+
+
+def upgrade(op):
+    op.add_column("products", "seo_tags", "TEXT")
+    op.add_column("products", "mumbai_keywords", "TEXT")
@@ -0,0 +1,6 @@
+"""Create the full-text product search index."""
+from app.services.search import create_search_index
+
+
+def upgrade(op):
+    create_search_index(op)
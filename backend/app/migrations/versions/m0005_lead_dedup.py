@@ -0,0 +1,38 @@
+"""Add lead deduplication columns, backfill normalized phones and index leads."""
+from sqlalchemy import text
+
+from app.services.lead_dedup import normalize_phone
+
+NEW_COLUMNS = {
+    "phone_normalized": "VARCHAR",
+    "hit_count": "INTEGER NOT NULL DEFAULT 1",
+    "last_seen_at": "TIMESTAMP",
+}
+
+# Spelled out rather than read from the Lead model, which gains indexes on
+# columns later migrations add
+INDEXES = {
+    "ix_leads_phone": "phone",
+    "ix_leads_created_at_id": "created_at, id",
+    "ix_leads_dedup": "phone_normalized, product, created_at",
+}
+
+
+def upgrade(op):
+    for column, ddl in NEW_COLUMNS.items():
+        op.add_column("leads", column, ddl)
+
+    if op.dry_run:
+        op.log("backfill leads.phone_normalized from leads.phone")
+    else:
+        rows = op.connection.execute(
+            text("SELECT id, phone FROM leads WHERE phone_normalized IS NULL")
+        ).fetchall()
+        if rows:
+            op.execute(
+                "UPDATE leads SET phone_normalized = :phone WHERE id = :id",
+                [{"id": row.id, "phone": normalize_phone(row.phone)} for row in rows],
+            )
+
+    for name, columns in INDEXES.items():
+        op.create_index(name, "leads", columns)
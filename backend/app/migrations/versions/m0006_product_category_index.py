@@ -0,0 +1,5 @@
+"""Index products.category_id for category listings and related products."""
+
+
+def upgrade(op):
+    op.create_index("ix_products_category_id", "products", "category_id")
@@ -0,0 +1,8 @@
+"""Replace the products.category_id index with composites covering category listings and related products."""
+
+
+def upgrade(op):
+    op.create_index("ix_products_category_slug", "products", "category_id, slug")
+    op.create_index("ix_products_category_id_id", "products", "category_id, id")
+    # Both composites lead with category_id, so the single-column index is redundant
+    op.drop_index("ix_products_category_id")
@@ -0,0 +1,12 @@
+"""Add updated_at to products and categories, backfilled with the migration time."""
+from datetime import datetime
+
+TABLES = ("products", "categories")
+
+
+def upgrade(op):
+    now = datetime.utcnow()
+    for table in TABLES:
+        op.add_column(table, "updated_at", "TIMESTAMP")
+        # Existing rows' real modification time is unknown
+        op.execute(f"UPDATE {table} SET updated_at = :now WHERE updated_at IS NULL", {"now": now})
@@ -0,0 +1,35 @@
+"""Add leads.updated_at and a change sequence to products, categories and leads, for the change feed."""
+from sqlalchemy import text
+
+# Existing rows are numbered table by table, oldest updated_at first
+TABLES = ("categories", "products", "leads")
+
+
+def upgrade(op):
+    op.create_all()  # change_sequence
+    op.add_column("leads", "updated_at", "TIMESTAMP")
+    op.execute("UPDATE leads SET updated_at = COALESCE(last_seen_at, created_at) WHERE updated_at IS NULL")
+    for table in TABLES:
+        op.add_column(table, "change_seq", "BIGINT")
+
+    if op.dry_run:
+        op.log("backfill change_seq in updated_at order and initialise change_sequence")
+    else:
+        last = op.connection.execute(text("SELECT value FROM change_sequence WHERE id = 1")).scalar()
+        if last is None:
+            last = 0
+            op.connection.execute(text("INSERT INTO change_sequence (id, value) VALUES (1, 0)"))
+        for table in TABLES:
+            ids = op.connection.execute(
+                text(f"SELECT id FROM {table} WHERE change_seq IS NULL ORDER BY updated_at, id")
+            ).scalars().all()
+            if ids:
+                op.execute(
+                    f"UPDATE {table} SET change_seq = :seq WHERE id = :id",
+                    [{"id": row_id, "seq": last + offset} for offset, row_id in enumerate(ids, 1)],
+                )
+                last += len(ids)
+        op.execute("UPDATE change_sequence SET value = :value WHERE id = 1", {"value": last})
+
+    for table in TABLES:
+        op.create_index(f"ix_{table}_change_seq", table, "change_seq")
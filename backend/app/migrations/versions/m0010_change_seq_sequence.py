@@ -0,0 +1,17 @@
+"""Draw change_seq numbers from a PostgreSQL sequence instead of the locked counter row."""
+from sqlalchemy import text
+
+
+def upgrade(op):
+    if op.dialect != "postgresql":
+        return  # other databases keep using change_sequence
+    op.execute("CREATE SEQUENCE IF NOT EXISTS change_seq")
+    # Continue after every number the counter or the backfill handed out
+    last = op.connection.execute(text(
+        "SELECT GREATEST("
+        "(SELECT COALESCE(MAX(value), 0) FROM change_sequence), "
+        "(SELECT COALESCE(MAX(change_seq), 0) FROM products), "
+        "(SELECT COALESCE(MAX(change_seq), 0) FROM categories), "
+        "(SELECT COALESCE(MAX(change_seq), 0) FROM leads))"
+    )).scalar()
+    op.execute("SELECT setval('change_seq', :next, false)", {"next": last + 1})
@@ -0,0 +1,6 @@
+"""Key the SQLite search index on a stable integer id and fold category names into the PostgreSQL one."""
+from app.services.search import rebuild_search_index
+
+
+def upgrade(op):
+    rebuild_search_index(op)
@@ -0,0 +1,9 @@
+"""Index lead dedup on the normalized product, the way the dedup check compares it."""
+
+
+def upgrade(op):
+    # Same expression as app.models.lead.normalized_product()
+    op.create_index(
+        "ix_leads_dedup_key", "leads", "phone_normalized, lower(trim(coalesce(product, ''))), created_at"
+    )
+    op.drop_index("ix_leads_dedup")
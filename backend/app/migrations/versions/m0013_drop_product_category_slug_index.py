@@ -0,0 +1,5 @@
+"""Drop ix_products_category_slug: category listings are served from the catalog snapshot."""
+
+
+def upgrade(op):
+    op.drop_index("ix_products_category_slug")
@@ -1,6 +1,9 @@
-from sqlalchemy import Column, String
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, DateTime, String, func, select
+from sqlalchemy.orm import column_property, relationship
 from app.core.database import Base
+from app.models.change import next_change_seq
+from app.models.product import Product
+from datetime import datetime
 import uuid
 
 class Category(Base):
@@ -10,17 +13,23 @@ class Category(Base):
     name = Column(String, unique=True, nullable=False, index=True)
     slug = Column(String, unique=True, nullable=False, index=True)
     description = Column(String, nullable=True)
+
+    # Last write to the row (sitemap lastmod) and its place in the change feed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    change_seq = Column(BigInteger, default=next_change_seq, onupdate=next_change_seq, index=True)
     
     # Relationship to products
     products = relationship("Product", back_populates="category", cascade="all, delete-orphan")
     
-    @property
-    def product_count(self) -> int:
-        """Return the count of products in this category. Always returns int >= 0."""
-        if self.products is None:
-            return 0
-        return len(self.products)
-    
     def __repr__(self):
         return f"<Category(id={self.id}, name={self.name}, slug={self.slug})>"
 
+
+# Product count is a correlated COUNT subquery loaded with the category row itself,
+# so serializing CategoryOut never lazy-loads the full Product rows.
+Category.product_count = column_property(
+    select(func.count(Product.id))
+    .where(Product.category_id == Category.id)
+    .correlate_except(Product)
+    .scalar_subquery()
+)
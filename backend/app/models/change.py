@@ -0,0 +1,87 @@
+from typing import List
+
+from sqlalchemy import BigInteger, Column, Integer, Sequence, event, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+
+# Source of the change_seq column of products, categories and leads.
+#
+# PostgreSQL draws numbers from the change_seq SEQUENCE: nextval takes no
+# row lock, so concurrent writers never wait on each other. Numbers become
+# visible in commit order only approximately; readers that need every row
+# cope with that (see app.services.changes and app.services.catalog).
+#
+# Other databases use this single-row counter, bumped inside the writer's
+# transaction. SQLite serializes writers anyway, so numbers become visible in
+# commit order.
+CHANGE_SEQUENCE = Sequence("change_seq")
+
+
+class ChangeSequence(Base):
+    __tablename__ = "change_sequence"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ChangeSequence(value={self.value})>"
+
+
+_COUNTER_ID = 1
+
+
+def allocate_change_seqs(connection, count: int = 1) -> List[int]:
+    """Reserve `count` change sequence numbers in one round trip, in increasing order."""
+    if connection.dialect.name == "postgresql":
+        # Not necessarily consecutive: other writers draw from the sequence concurrently
+        return list(connection.execute(
+            text("SELECT nextval('change_seq') FROM generate_series(1, :count)"), {"count": count}
+        ).scalars())
+
+    params = {"id": _COUNTER_ID, "count": count}
+    result = connection.execute(
+        text("UPDATE change_sequence SET value = value + :count WHERE id = :id"), params
+    )
+    last = None
+    if result.rowcount:
+        last = connection.execute(
+            text("SELECT value FROM change_sequence WHERE id = :id"), params
+        ).scalar()
+    if last is None:
+        # Counter row not created yet (migrations not run on this database)
+        connection.execute(
+            text("INSERT INTO change_sequence (id, value) VALUES (:id, :count)"), params
+        )
+        last = count
+    return list(range(last - count + 1, last + 1))
+
+
+def next_change_seq(context) -> int:
+    """Column default/onupdate for change_seq, for Core writes that do not set it."""
+    return allocate_change_seqs(context.connection)[0]
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_change_seqs(session, flush_context, instances):
+    """
+    Number every tracked row the flush writes at once: nextval inline in
+    each INSERT/UPDATE on PostgreSQL, one counter block elsewhere, instead
+    of one extra statement per row from the column default.
+    """
+    pending = []
+    for obj in (*session.new, *session.dirty):
+        state = inspect(obj)
+        if "change_seq" not in state.mapper.columns or state.attrs.change_seq.history.has_changes():
+            continue
+        if obj in session.new or session.is_modified(obj):
+            pending.append(obj)
+    if not pending:
+        return
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        for obj in pending:
+            obj.change_seq = CHANGE_SEQUENCE.next_value()
+    else:
+        for obj, seq in zip(pending, allocate_change_seqs(connection, len(pending))):
+            obj.change_seq = seq
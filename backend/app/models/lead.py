@@ -1,8 +1,16 @@
-from sqlalchemy import Column, String, DateTime, Text
+from sqlalchemy import Column, String, DateTime, Text, Integer, BigInteger, Index, func, literal_column
 from app.core.database import Base
+from app.models.change import next_change_seq
 from datetime import datetime
 import uuid
 
+
+def normalized_product(product):
+    """The product as lead dedup compares it: trimmed, lowercased, NULL as ''."""
+    # '' as a literal, not a bound parameter, so queries match the index expression
+    return func.lower(func.trim(func.coalesce(product, literal_column("''"))))
+
+
 class Lead(Base):
     __tablename__ = "leads"
 
@@ -14,3 +22,19 @@ class Lead(Base):
     page_url = Column(String)
     message = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    # Repeat enquiries from the same phone for the same product are merged
+    phone_normalized = Column(String)
+    hit_count = Column(Integer, nullable=False, default=1)
+    last_seen_at = Column(DateTime)
+
+    # Last write to the row and its place in the change feed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(BigInteger, default=next_change_seq, onupdate=next_change_seq, index=True)
+
+    __table_args__ = (
+        # Keyset pagination order for the lead listing (newest first)
+        Index("ix_leads_created_at_id", "created_at", "id"),
+        # Dedup lookup: same phone + normalized product within a time window
+        Index("ix_leads_dedup_key", "phone_normalized", normalized_product(product), "created_at"),
+    )
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey, Text, Index, DateTime
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.change import next_change_seq
+from datetime import datetime
 import uuid
 
 class Product(Base):
@@ -24,9 +26,21 @@ class Product(Base):
     # SEO fields
     seo_meta_title = Column(String, nullable=True)
     seo_meta_description = Column(Text, nullable=True)
+    seo_tags = Column(Text, nullable=True)
+    mumbai_keywords = Column(Text, nullable=True)
+
+    # Last write to the row (sitemap lastmod) and its place in the change feed
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    change_seq = Column(BigInteger, default=next_change_seq, onupdate=next_change_seq, index=True)
     
     # Relationship to category
     category = relationship("Category", back_populates="products")
+
+    __table_args__ = (
+        # Related products (category_id = ? AND id != ?) and per-category
+        # product counts, answered from the index alone
+        Index("ix_products_category_id_id", "category_id", "id"),
+    )
     
     def __repr__(self):
         return f"<Product(id={self.id}, name={self.name}, slug={self.slug}, category_id={self.category_id})>"
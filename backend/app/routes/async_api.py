@@ -0,0 +1,306 @@
+"""
+Async variants of the category, product and lead routers (DATABASE_ASYNC=true).
+
+Catalog reads are already async and served from memory, so only the routes
+that talk to the database are reimplemented here on an AsyncSession. Every
+other route is mirrored from the sync router, keeping paths, response models
+and route order (specific paths before /{slug}) identical.
+"""
+from typing import Callable, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.deps import get_async_db
+from app.core.http_cache import conditional_response
+from app.core.pagination import list_response, parse_fields
+from app.models.category import Category
+from app.models.lead import Lead
+from app.models.product import Product
+from app.routes import categories, leads, products
+from app.schemas.category import CategoryCreate
+from app.schemas.lead import LeadCreate, LeadOut
+from app.schemas.product import ProductCreate
+from app.services import autocomplete, product_bulk, search
+from app.services.catalog import catalog_cache
+from app.services.lead_dedup import lead_dedup, new_lead_record
+from app.services.lead_queue import lead_queue
+
+
+def mirror_router(sync_router: APIRouter, overrides: Dict[str, Callable]) -> APIRouter:
+    """Copy a router's routes in order, swapping in async endpoints by route name."""
+    router = APIRouter()
+    for route in sync_router.routes:
+        router.add_api_route(
+            route.path,
+            overrides.get(route.name, route.endpoint),
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            name=route.name,
+        )
+    return router
+
+
+async def create_category(data: CategoryCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new category.
+    Slug must be unique and lowercase with hyphens only.
+    """
+    try:
+        existing = await db.scalar(select(Category.id).where(Category.slug == data.slug))
+        if existing:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Category with slug '{data.slug}' already exists"
+            )
+
+        existing_name = await db.scalar(select(Category.id).where(Category.name == data.name))
+        if existing_name:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Category with name '{data.name}' already exists"
+            )
+
+        category = Category(**data.model_dump())
+        db.add(category)
+        await db.flush()  # Flush to catch constraint errors before commit
+        await db.commit()
+        await db.refresh(category)
+        return category
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Category with this slug or name already exists"
+        )
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating category: {str(e)}"
+        )
+
+
+async def create_product(data: ProductCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new product.
+    - category_id must exist in categories table
+    - slug must be unique
+    - slug must be lowercase with hyphens only
+    """
+    try:
+        category = await db.scalar(select(Category.id).where(Category.id == data.category_id))
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Category with id '{data.category_id}' not found"
+            )
+
+        existing_slug = await db.scalar(select(Product.id).where(Product.slug == data.slug))
+        if existing_slug:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Product with slug '{data.slug}' already exists"
+            )
+
+        product = Product(**data.model_dump())
+        db.add(product)
+        await db.flush()  # Catch constraint errors before commit
+        await db.commit()
+        await db.refresh(product)
+        return product
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Product with this slug already exists or invalid category"
+        )
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating product: {str(e)}"
+        )
+
+
+async def bulk_upsert_products(items: List[ProductCreate], db: AsyncSession = Depends(get_async_db)):
+    """
+    Create or update many products in one transaction.
+    - existing slugs are updated in place, new slugs are created
+    - rows with an unknown category_id or a slug repeated in the request are
+      reported as errors; the rest of the batch is still written
+    Returns one result per record, in request order.
+    """
+    if len(items) > product_bulk.MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {product_bulk.MAX_ITEMS} products per request"
+        )
+    try:
+        result = await db.run_sync(product_bulk.bulk_upsert, items)
+        await db.commit()
+        return result
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bulk upsert violated a database constraint"
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error upserting products: {str(e)}"
+        )
+
+
+async def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Full-text search over products, best matches first.
+    Falls back to typo-tolerant matching when nothing matches exactly.
+    """
+    try:
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "search")
+        if not_modified:
+            return not_modified
+        results = await search.search_products_async(db, q, limit)
+        if not results:
+            results = autocomplete.fuzzy_search(q, limit)
+        return results
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Search failed: {str(e)}"
+        )
+
+
+async def create_lead(data: LeadCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    """
+    Create a new lead from a customer inquiry.
+    Repeats within the dedup window are merged (200); queued leads return 202.
+    """
+    record = new_lead_record(data)
+    try:
+        duplicate = lead_dedup.cached(record)
+        statement = lead_dedup.lookup_statement(record) if duplicate is None else None
+        if statement is not None:
+            row = (await db.execute(statement)).first()
+            if row is not None:
+                duplicate = lead_dedup.found(record, row)
+
+        if lead_queue.enabled:
+            if duplicate:
+                lead_queue.record_hit(duplicate.id, record["created_at"])
+                response.status_code = status.HTTP_200_OK
+                return duplicate
+            response.status_code = status.HTTP_202_ACCEPTED
+            lead = lead_queue.submit(record)
+            lead_dedup.remember(record)
+            return lead
+
+        if duplicate:
+            result = await db.execute(
+                update(Lead)
+                .where(Lead.id == duplicate.id)
+                .values(hit_count=Lead.hit_count + 1, last_seen_at=record["created_at"])
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                await db.commit()
+                response.status_code = status.HTTP_200_OK
+                return duplicate
+            # The earlier lead is not stored (yet): keep this one as a new lead
+
+        lead = Lead(**record)
+        db.add(lead)
+        await db.commit()
+        lead_dedup.remember(record)
+        return LeadOut(**record)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid lead data"
+        )
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error creating lead: {str(e)}"
+        )
+
+
+async def get_leads(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,phone,created_at"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get leads, newest first, one page at a time.
+    Pass the X-Next-Cursor response header back as 'cursor' for the next page.
+    """
+    try:
+        selected = parse_fields(fields, LeadOut)
+        result = await db.execute(leads.leads_page_statement(limit, cursor, selected))
+        rows: List = result.all() if selected else result.scalars().all()
+        rows, next_cursor = leads.finish_leads_page(rows, limit, selected)
+        return list_response(response, rows, next_cursor, selected)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving leads: {str(e)}"
+        )
+
+
+async def get_lead(lead_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Get a single lead by ID.
+    """
+    try:
+        lead = await db.get(Lead, lead_id)
+        if not lead:
+            raise HTTPException(status_code=404, detail="Lead not found")
+        return lead
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving lead: {str(e)}"
+        )
+
+
+categories_router = mirror_router(categories.router, {
+    "create_category": create_category,
+})
+
+products_router = mirror_router(products.router, {
+    "create_product": create_product,
+    "bulk_upsert_products": bulk_upsert_products,
+    "search_products": search_products,
+})
+
+leads_router = mirror_router(leads.router, {
+    "create_lead": create_lead,
+    "get_leads": get_leads,
+    "get_lead": get_lead,
+})
@@ -1,10 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.core.deps import get_db
+from app.core.http_cache import conditional_response
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryOut
+from app.services.catalog import catalog_cache
+from app.services.materialized import encode_categories, materialized_response
 
 router = APIRouter(prefix="/api/categories", tags=["Categories"])
 
@@ -55,16 +58,19 @@ def create_category(data: CategoryCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[CategoryOut])
-def get_categories(db: Session = Depends(get_db)):
+async def get_categories(request: Request, response: Response):
     """
     Get all categories (10 total) with product count for each.
     Returns all medical equipment rental categories.
     """
     try:
-        categories = db.query(Category).all()
-        if not categories:
-            return []
-        return categories
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "categories")
+        if not_modified:
+            return not_modified
+        return await materialized_response(
+            request, response, catalog, "categories", lambda: encode_categories(catalog.categories)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -73,13 +79,17 @@ def get_categories(db: Session = Depends(get_db)):
 
 
 @router.get("/{category_slug}", response_model=CategoryOut)
-def get_category(category_slug: str, db: Session = Depends(get_db)):
+async def get_category(category_slug: str, request: Request, response: Response):
     """
     Get a single category by slug with product count.
     Returns 404 if category not found.
     """
     try:
-        category = db.query(Category).filter(Category.slug == category_slug).first()
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "category_detail")
+        if not_modified:
+            return not_modified
+        category = catalog.get_category(category_slug)
         if not category:
             raise HTTPException(status_code=404, detail=f"Category '{category_slug}' not found")
         
@@ -0,0 +1,31 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.core.deps import get_read_db
+from app.schemas.change import ChangeFeed
+from app.services import changes
+
+router = APIRouter(prefix="/api/changes", tags=["Changes"])
+
+@router.get("/", response_model=ChangeFeed)
+def get_changes(
+    since: int = Query(0, ge=0, description="next_since from the previous page (0 for a full sync)"),
+    limit: int = Query(500, ge=1, le=5000),
+    tables: Optional[str] = Query(None, description="Comma-separated tables: products,categories,leads (default all)"),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Rows created or modified after the `since` change sequence number, oldest
+    change first. Keep calling with since=next_since while has_more is true.
+    """
+    try:
+        selected = changes.parse_tables(tables)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    try:
+        return changes.changes_since(db, since, limit, selected)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error retrieving changes: {str(e)}"
+        )
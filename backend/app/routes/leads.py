@@ -1,24 +1,60 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from app.core.deps import get_db
+from app.core.deps import get_db, get_read_db
+from app.core.pagination import decode_cursor, encode_cursor, list_response, parse_fields
 from app.models.lead import Lead
 from app.schemas.lead import LeadCreate, LeadOut
+from app.services import lead_export
+from app.services.lead_dedup import lead_dedup, new_lead_record
+from app.services.lead_queue import lead_queue
 
 router = APIRouter(prefix="/api/leads", tags=["Leads"])
 
 @router.post("/", response_model=LeadOut, status_code=status.HTTP_201_CREATED)
-def create_lead(data: LeadCreate, db: Session = Depends(get_db)):
+def create_lead(data: LeadCreate, response: Response, db: Session = Depends(get_db)):
     """
     Create a new lead from a customer inquiry.
+    A repeat enquiry for the same phone and product within the dedup window
+    is merged into the earlier lead's hit_count and returns that lead (200).
+    When the ingestion queue is enabled a new lead is acknowledged with
+    202 Accepted and written to the database in the next batch.
     """
+    record = new_lead_record(data)
     try:
-        lead = Lead(**data.model_dump())
+        duplicate = lead_dedup.find(db, record)
+
+        if lead_queue.enabled:
+            if duplicate:
+                lead_queue.record_hit(duplicate.id, record["created_at"])
+                response.status_code = status.HTTP_200_OK
+                return duplicate
+            response.status_code = status.HTTP_202_ACCEPTED
+            lead = lead_queue.submit(record)
+            lead_dedup.remember(record)
+            return lead
+
+        if duplicate:
+            updated = db.query(Lead).filter(Lead.id == duplicate.id).update(
+                {Lead.hit_count: Lead.hit_count + 1, Lead.last_seen_at: record["created_at"]},
+                synchronize_session=False
+            )
+            if updated:
+                db.commit()
+                response.status_code = status.HTTP_200_OK
+                return duplicate
+            # The earlier lead is not stored (yet): keep this one as a new lead
+
+        lead = Lead(**record)
         db.add(lead)
         db.flush()  # Catch constraint errors before commit
         db.commit()
         db.refresh(lead)
+        lead_dedup.remember(record)
         return lead
     except IntegrityError as e:
         db.rollback()
@@ -35,13 +71,26 @@ def create_lead(data: LeadCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=List[LeadOut])
-def get_leads(db: Session = Depends(get_db)):
+def get_leads(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,phone,created_at"),
+    db: Session = Depends(get_read_db)
+):
     """
-    Get all leads.
+    Get leads, newest first, one page at a time.
+    Pass the X-Next-Cursor response header back as 'cursor' for the next page.
+    'fields' limits the columns selected from the database.
     """
     try:
-        leads = db.query(Lead).all()
-        return leads
+        selected = parse_fields(fields, LeadOut)
+        result = db.execute(leads_page_statement(limit, cursor, selected))
+        rows = result.all() if selected else result.scalars().all()
+        rows, next_cursor = finish_leads_page(rows, limit, selected)
+        return list_response(response, rows, next_cursor, selected)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -49,8 +98,65 @@ def get_leads(db: Session = Depends(get_db)):
         )
 
 
+def leads_page_statement(limit: int, cursor: Optional[str], selected: Optional[List[str]]):
+    """SELECT for one page of leads, newest first, fetching one extra row to detect a next page."""
+    if selected:
+        # The keyset columns are always selected so the next cursor can be built.
+        columns = list(dict.fromkeys(selected + ["created_at", "id"]))
+        statement = select(*[getattr(Lead, name) for name in columns])
+    else:
+        statement = select(Lead)
+
+    if cursor:
+        created_at, lead_id = decode_cursor(cursor, 2)
+        try:
+            created_at = datetime.fromisoformat(created_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        statement = statement.where(
+            or_(
+                Lead.created_at < created_at,
+                and_(Lead.created_at == created_at, Lead.id < lead_id)
+            )
+        )
+
+    return statement.order_by(Lead.created_at.desc(), Lead.id.desc()).limit(limit + 1)
+
+
+def finish_leads_page(rows: list, limit: int, selected: Optional[List[str]]):
+    """Trim the look-ahead row, build the next cursor and apply the projection."""
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    if selected:
+        rows = [{name: getattr(row, name) for name in selected} for row in rows]
+    return rows, next_cursor
+
+
+@router.get("/export")
+def export_leads(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, description="Only leads created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only leads created before this time"),
+    source: Optional[str] = Query(None, description="whatsapp, call, popup or form"),
+):
+    """
+    Stream leads as NDJSON or CSV, oldest first.
+    Rows are read in batches from a server-side cursor, so exports of any
+    size run in constant memory.
+    """
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return StreamingResponse(
+        lead_export.STREAMERS[export_format](since, until, source),
+        media_type=lead_export.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="leads-{stamp}.{export_format}"'},
+    )
+
+
 @router.get("/{lead_id}", response_model=LeadOut)
-def get_lead(lead_id: str, db: Session = Depends(get_db)):
+def get_lead(lead_id: str, db: Session = Depends(get_read_db)):
     """
     Get a single lead by ID.
     """
@@ -1,12 +1,18 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
-from app.core.deps import get_db
+from app.core.deps import get_db, get_read_db
+from app.core.http_cache import conditional_response
+from app.core.pagination import list_response, parse_fields
 from app.models.product import Product
 from app.models.category import Category
-from app.schemas.product import ProductCreate, ProductOut, ProductDetail, ProductSearchResult
+from app.schemas.product import (
+    BulkProductResponse, ProductCreate, ProductOut, ProductDetail, ProductSearchResult, ProductSuggestion
+)
+from app.services import autocomplete, product_bulk, search
+from app.services.catalog import catalog_cache
+from app.services.materialized import encode_model, encode_products, materialized_response
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
@@ -58,56 +64,63 @@ def create_product(data: ProductCreate, db: Session = Depends(get_db)):
         )
 
 
+@router.post("/bulk", response_model=BulkProductResponse)
+def bulk_upsert_products(items: List[ProductCreate], db: Session = Depends(get_db)):
+    """
+    Create or update many products in one transaction.
+    - existing slugs are updated in place, new slugs are created
+    - rows with an unknown category_id or a slug repeated in the request are
+      reported as errors; the rest of the batch is still written
+    Returns one result per record, in request order.
+    """
+    if len(items) > product_bulk.MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {product_bulk.MAX_ITEMS} products per request"
+        )
+    try:
+        result = product_bulk.bulk_upsert(db, items)
+        db.commit()
+        return result
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Bulk upsert violated a database constraint"
+        )
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error upserting products: {str(e)}"
+        )
+
+
 # IMPORTANT: Specific routes MUST come before generic {product_slug} route
 @router.get("/search", response_model=List[ProductSearchResult])
-def search_products(q: str = Query(..., min_length=1, max_length=255), db: Session = Depends(get_db)):
+def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
     """
-    Search products by name or category.
-    Query string 'q' is required and searches:
-    - Product name (case-insensitive)
-    - Category name (case-insensitive)
+    Full-text search over products, best matches first.
+    Query string 'q' is required; every word is prefix-matched against:
+    - Product name and category name
+    - SEO tags and area keywords
+    - Key features and description
+    Falls back to typo-tolerant matching when nothing matches exactly.
     """
     try:
-        search_term = f"%{q.lower()}%"
-        
-        # Query using columns to avoid relationship issues
-        results = (
-            db.query(
-                Product.id,
-                Product.name,
-                Product.slug,
-                Product.price_1month,
-                Product.image_url,
-                Product.youtube_url,
-                Category.name.label("category_name"),
-                Category.slug.label("category_slug")
-            )
-            .join(Category, Product.category_id == Category.id)
-            .filter(
-                or_(
-                    Product.name.ilike(search_term),
-                    Category.name.ilike(search_term)
-                )
-            )
-            .all()
-        )
-        
-        # Convert tuples to schema objects
-        search_results = [
-            ProductSearchResult(
-                id=row.id,
-                name=row.name,
-                slug=row.slug,
-                category_name=row.category_name,
-                category_slug=row.category_slug,
-                price_1month=row.price_1month,
-                image_url=row.image_url,
-                youtube_url=row.youtube_url
-            )
-            for row in results
-        ]
-        
-        return search_results
+        not_modified = conditional_response(request, response, catalog_cache.get(), "search")
+        if not_modified:
+            return not_modified
+        results = search.search_products(db, q, limit)
+        if not results:
+            results = autocomplete.fuzzy_search(q, limit)
+        return results
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -115,23 +128,50 @@ def search_products(q: str = Query(..., min_length=1, max_length=255), db: Sessi
         )
 
 
-@router.get("/category/{category_slug}", response_model=List[ProductOut])
-def get_products_by_category(
-    category_slug: str, 
-    db: Session = Depends(get_db)
+@router.get("/autocomplete", response_model=List[ProductSuggestion])
+async def autocomplete_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=255),
+    limit: int = Query(8, ge=1, le=20)
 ):
+    """
+    Search-as-you-type suggestions (name and slug only).
+    Tolerates misspellings such as "oxygen concentrater".
+    """
+    try:
+        catalog = await catalog_cache.aget()  # build a missing snapshot off the event loop
+        not_modified = conditional_response(request, response, catalog, "autocomplete")
+        if not_modified:
+            return not_modified
+        return autocomplete.suggest(q, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Autocomplete failed: {str(e)}"
+        )
+
+
+@router.get("/category/{category_slug}", response_model=List[ProductOut])
+async def get_products_by_category(category_slug: str, request: Request, response: Response):
     """
     Get all products in a specific category by category slug.
     Returns empty list if category has no products.
     Returns 404 if category doesn't exist.
     """
     try:
-        category = db.query(Category).filter(Category.slug == category_slug).first()
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "category_products")
+        if not_modified:
+            return not_modified
+        category = catalog.get_category(category_slug)
         if not category:
             raise HTTPException(status_code=404, detail=f"Category '{category_slug}' not found")
         
-        products = db.query(Product).filter(Product.category_id == category.id).all()
-        return products
+        return await materialized_response(
+            request, response, catalog, f"category-products:{category.id}",
+            lambda: encode_products(catalog.products_in_category(category.id))
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -142,17 +182,23 @@ def get_products_by_category(
 
 
 @router.get("/{product_slug}", response_model=ProductDetail)
-def get_product(product_slug: str, db: Session = Depends(get_db)):
+async def get_product(product_slug: str, request: Request, response: Response):
     """
     Get a single product by slug.
     Returns 404 if product not found.
     """
     try:
-        product = db.query(Product).filter(Product.slug == product_slug).first()
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "product_detail")
+        if not_modified:
+            return not_modified
+        product = catalog.get_product(product_slug)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product '{product_slug}' not found")
         
-        return product
+        return await materialized_response(
+            request, response, catalog, f"product:{product.id}", lambda: encode_model(product)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -163,30 +209,25 @@ def get_product(product_slug: str, db: Session = Depends(get_db)):
 
 
 @router.get("/{product_slug}/related", response_model=List[ProductOut])
-def get_related_products(
-    product_slug: str,
-    db: Session = Depends(get_db)
-):
+async def get_related_products(product_slug: str, request: Request, response: Response):
     """
-    Get related products (same category, exclude current, max 4 items).
+    Get related products (max 4 items), precomputed with the catalog snapshot:
+    same category first, ranked by price proximity and feature/description similarity.
     Returns 404 if product not found.
     """
     try:
-        product = db.query(Product).filter(Product.slug == product_slug).first()
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "related_products")
+        if not_modified:
+            return not_modified
+        product = catalog.get_product(product_slug)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product '{product_slug}' not found")
-        
-        related = (
-            db.query(Product)
-            .filter(
-                Product.category_id == product.category_id,
-                Product.id != product.id
-            )
-            .limit(4)
-            .all()
+
+        return await materialized_response(
+            request, response, catalog, f"related:{product.id}",
+            lambda: encode_products(catalog.related_products(product.id))
         )
-        
-        return related
     except HTTPException:
         raise
     except Exception as e:
@@ -197,19 +238,41 @@ def get_related_products(
 
 
 @router.get("/", response_model=List[ProductOut])
-def get_all_products(db: Session = Depends(get_db)):
+async def get_all_products(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Slug of the last product on the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,slug")
+):
     """
     Get all products (41 total).
     Returns all available products for rental.
+    With limit/cursor, products are paged in slug order and the next cursor
+    is returned in the X-Next-Cursor header.
     """
     try:
-        products = db.query(Product).all()
-        if not products:
-            return []
-        return products
+        selected = parse_fields(fields, ProductOut)
+        catalog = await catalog_cache.aget()
+        not_modified = conditional_response(request, response, catalog, "product_list")
+        if not_modified:
+            return not_modified
+        if limit is None and cursor is None:
+            if not selected:
+                return await materialized_response(
+                    request, response, catalog, "products", lambda: encode_products(catalog.products)
+                )
+            products, next_cursor = catalog.products, None
+        else:
+            products, next_cursor = catalog.page_by_slug(cursor, limit)
+
+        if selected:
+            products = [p.model_dump(include=set(selected)) for p in products]
+        return list_response(response, list(products), next_cursor, selected)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error retrieving products: {str(e)}"
         )
-
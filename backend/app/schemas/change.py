@@ -0,0 +1,17 @@
+from typing import Any, Dict, List, Literal
+from pydantic import BaseModel
+from datetime import datetime
+
+class ChangeOut(BaseModel):
+    """One changed row, in its current state."""
+    seq: int
+    table: Literal["products", "categories", "leads"]
+    id: str
+    updated_at: datetime
+    data: Dict[str, Any]
+
+class ChangeFeed(BaseModel):
+    """Schema for change feed pages; pass next_since back as since."""
+    changes: List[ChangeOut]
+    next_since: int
+    has_more: bool
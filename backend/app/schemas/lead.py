@@ -16,6 +16,8 @@ class LeadCreate(LeadBase):
 class LeadOut(LeadBase):
     id: str
     created_at: datetime
+    hit_count: int = 1
+    last_seen_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
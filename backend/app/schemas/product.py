@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 class ProductCreate(BaseModel):
@@ -16,6 +16,8 @@ class ProductCreate(BaseModel):
     youtube_url: Optional[str] = None
     seo_meta_title: Optional[str] = None
     seo_meta_description: Optional[str] = None
+    seo_tags: Optional[str] = None
+    mumbai_keywords: Optional[str] = None
 
 class ProductOut(BaseModel):
     """Schema for product responses (list/detail)."""
@@ -55,3 +57,25 @@ class ProductSearchResult(BaseModel):
     class Config:
         from_attributes = True
 
+
+class ProductSuggestion(BaseModel):
+    """Schema for autocomplete suggestions."""
+    name: str
+    slug: str
+
+
+class BulkProductResult(BaseModel):
+    """Outcome of one record in a bulk upsert, by position in the request."""
+    index: int
+    slug: str
+    status: Literal["created", "updated", "error"]
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkProductResponse(BaseModel):
+    """Schema for bulk upsert responses."""
+    created: int
+    updated: int
+    failed: int
+    results: List[BulkProductResult]
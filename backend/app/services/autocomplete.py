@@ -0,0 +1,193 @@
+"""
+Typo-tolerant search-as-you-type over the catalog snapshot.
+
+Every distinct word in product names, category names and SEO/area keywords is
+split into trigrams. A query word is matched against the vocabulary by trigram
+overlap (so "concentrater" still finds "concentrator") with a boost for prefix
+matches while the customer is still typing. The index follows the catalog
+snapshot and only re-indexes products whose text actually changed.
+"""
+import heapq
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+from app.schemas.product import ProductSearchResult, ProductSuggestion
+from app.services.catalog import CatalogSnapshot, catalog_cache
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# How much a word counts depending on where it appears in the product.
+NAME_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.3
+
+# Minimum trigram similarity for a vocabulary word to count as a match.
+MIN_SIMILARITY = 0.35
+PREFIX_SIMILARITY = 0.9
+
+
+def _words(value: str) -> List[str]:
+    return [w for w in _TOKEN_RE.findall(value.lower()) if len(w) > 1]
+
+
+def _trigrams(word: str) -> Set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Word-level trigram index mapping vocabulary words to weighted product postings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._fingerprints: Dict[str, Tuple[str, str, str]] = {}
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._term_trigrams: Dict[str, Set[str]] = {}
+        self._trigram_terms: Dict[str, Set[str]] = defaultdict(set)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def sync(self, snapshot: CatalogSnapshot) -> int:
+        """Bring the index up to date with a snapshot; returns products re-indexed."""
+        with self._lock:
+            if snapshot.version == self._version:
+                return 0
+            changed = 0
+            for product_id in set(self._fingerprints) - set(snapshot.products_by_id):
+                self._remove(product_id)
+                changed += 1
+            for product in snapshot.products:
+                category = snapshot.categories_by_id.get(product.category_id)
+                fingerprint = (
+                    product.name,
+                    category.name if category else "",
+                    snapshot.keywords_by_id.get(product.id, ""),
+                )
+                if self._fingerprints.get(product.id) == fingerprint:
+                    continue
+                self._remove(product.id)
+                self._add(product.id, fingerprint)
+                changed += 1
+            self._version = snapshot.version
+            return changed
+
+    def _add(self, product_id: str, fingerprint: Tuple[str, str, str]) -> None:
+        terms: Dict[str, float] = {}
+        for text, weight in zip(fingerprint, (NAME_WEIGHT, CATEGORY_WEIGHT, KEYWORD_WEIGHT)):
+            for word in _words(text):
+                if terms.get(word, 0.0) < weight:
+                    terms[word] = weight
+        for word, weight in terms.items():
+            if word not in self._postings:
+                self._postings[word] = {}
+                grams = _trigrams(word)
+                self._term_trigrams[word] = grams
+                for gram in grams:
+                    self._trigram_terms[gram].add(word)
+            self._postings[word][product_id] = weight
+        self._doc_terms[product_id] = terms
+        self._fingerprints[product_id] = fingerprint
+
+    def _remove(self, product_id: str) -> None:
+        terms = self._doc_terms.pop(product_id, None)
+        self._fingerprints.pop(product_id, None)
+        if not terms:
+            return
+        for word in terms:
+            postings = self._postings[word]
+            postings.pop(product_id, None)
+            if postings:
+                continue
+            del self._postings[word]
+            for gram in self._term_trigrams.pop(word):
+                bucket = self._trigram_terms[gram]
+                bucket.discard(word)
+                if not bucket:
+                    del self._trigram_terms[gram]
+
+    def _similar_terms(self, word: str) -> Iterable[Tuple[str, float]]:
+        grams = _trigrams(word)
+        overlap: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for term in self._trigram_terms.get(gram, ()):
+                overlap[term] += 1
+        for term, shared in overlap.items():
+            similarity = shared / (len(grams) + len(self._term_trigrams[term]) - shared)
+            if term.startswith(word):
+                similarity = max(similarity, PREFIX_SIMILARITY)
+            if similarity >= MIN_SIMILARITY:
+                yield term, similarity
+
+    def search(self, q: str, limit: int = 10) -> List[str]:
+        """Return up to limit product ids, products matching more query words first."""
+        words = _words(q)
+        if not words:
+            return []
+        with self._lock:
+            scores: Dict[str, float] = defaultdict(float)
+            matched: Dict[str, int] = defaultdict(int)
+            for word in words:
+                best: Dict[str, float] = {}
+                for term, similarity in self._similar_terms(word):
+                    for product_id, weight in self._postings[term].items():
+                        score = similarity * weight
+                        if score > best.get(product_id, 0.0):
+                            best[product_id] = score
+                for product_id, score in best.items():
+                    scores[product_id] += score
+                    matched[product_id] += 1
+        top = heapq.nlargest(limit, scores, key=lambda pid: (matched[pid], scores[pid]))
+        return top
+
+
+product_index = TrigramIndex()
+
+
+def _current_snapshot() -> CatalogSnapshot:
+    snapshot = catalog_cache.get()
+    if snapshot.version != product_index.version:
+        product_index.sync(snapshot)
+    return snapshot
+
+
+def suggest(q: str, limit: int = 8) -> List[ProductSuggestion]:
+    """Names and slugs for the autocomplete dropdown."""
+    snapshot = _current_snapshot()
+    return [
+        ProductSuggestion(name=product.name, slug=product.slug)
+        for product in (snapshot.products_by_id.get(pid) for pid in product_index.search(q, limit))
+        if product is not None
+    ]
+
+
+def fuzzy_search(q: str, limit: int = 20) -> List[ProductSearchResult]:
+    """Typo-tolerant search shaped like the full-text results."""
+    snapshot = _current_snapshot()
+    results = []
+    for product_id in product_index.search(q, limit):
+        product = snapshot.products_by_id.get(product_id)
+        category = snapshot.categories_by_id.get(product.category_id) if product else None
+        if product is None or category is None:
+            continue
+        results.append(
+            ProductSearchResult(
+                id=product.id,
+                name=product.name,
+                slug=product.slug,
+                category_name=category.name,
+                category_slug=category.slug,
+                price_1month=product.price_1month,
+                image_url=product.image_url,
+                youtube_url=product.youtube_url
+            )
+        )
+    return results
@@ -0,0 +1,496 @@
+"""
+In-process catalog snapshot cache.
+
+The storefront reads the same small catalog over and over, while writes only
+happen through create_product/create_category and the update_* scripts.
+Read routes are served from an immutable snapshot indexed by slug, id and
+category; any commit that touches a Product or Category swaps in a new
+snapshot. Related products are precomputed as part of the build.
+
+Each snapshot records the change_seq of every row it contains, so a refresh
+only reads the rows written since the highest one (see app.models.change).
+The refresh then compares each table's row count and change_seq sum with
+the refreshed snapshot. A mismatch means a row was deleted, or committed
+with a sequence number the snapshot had already passed. In either case,
+the catalog is reloaded in full.
+
+On PostgreSQL the committing worker also sends NOTIFY on CATALOG_CHANNEL
+with the new sequence number; app.services.catalog_sync refreshes every
+other worker. Commits made on the event loop (the DATABASE_ASYNC stack)
+leave the refresh and the NOTIFY to a background thread, so the loop
+never waits on them.
+"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal, get_engine
+from app.models.category import Category
+from app.models.product import Product
+from app.schemas.category import CategoryOut
+from app.schemas.product import ProductOut
+from app.services.related import compute_related
+
+logger = logging.getLogger(__name__)
+
+_CATALOG_MODELS = (Product, Category)
+_DIRTY_KEY = "catalog_dirty"
+
+CATALOG_CHANNEL = os.getenv("CATALOG_SYNC_CHANNEL", "catalog_changed")
+
+
+class CatalogSnapshot:
+    """Immutable view of all products and categories at a given version."""
+
+    __slots__ = (
+        "version",
+        "change_seq",
+        "product_seqs",
+        "category_seqs",
+        "built_at",
+        "fingerprint",
+        "products",
+        "categories",
+        "products_by_id",
+        "products_by_slug",
+        "products_by_category",
+        "categories_by_slug",
+        "categories_by_id",
+        "keywords_by_id",
+        "related_by_id",
+        "products_in_slug_order",
+        "sorted_slugs",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        products: List[ProductOut],
+        categories: List[CategoryOut],
+        keywords: Optional[Dict[str, str]] = None,
+        built_at: Optional[datetime] = None,
+        product_seqs: Optional[Dict[str, int]] = None,
+        category_seqs: Optional[Dict[str, int]] = None,
+    ):
+        self.version = version
+        # id -> change_seq of every row, and the highest of them
+        self.product_seqs = MappingProxyType(dict(product_seqs or {}))
+        self.category_seqs = MappingProxyType(dict(category_seqs or {}))
+        self.change_seq = max((*self.product_seqs.values(), *self.category_seqs.values()), default=0)
+        self.built_at = built_at or datetime.now(timezone.utc)
+        self.products: Tuple[ProductOut, ...] = tuple(products)
+        self.categories: Tuple[CategoryOut, ...] = tuple(categories)
+        self.products_by_id = MappingProxyType({p.id: p for p in self.products})
+        self.products_by_slug = MappingProxyType({p.slug: p for p in self.products})
+        self.categories_by_slug = MappingProxyType({c.slug: c for c in self.categories})
+        self.categories_by_id = MappingProxyType({c.id: c for c in self.categories})
+        # SEO tags and area keywords are not part of ProductOut but feed search.
+        self.keywords_by_id = MappingProxyType(dict(keywords or {}))
+        self.products_in_slug_order = tuple(sorted(self.products, key=lambda p: p.slug))
+        self.sorted_slugs = tuple(p.slug for p in self.products_in_slug_order)
+
+        by_category: Dict[str, List[ProductOut]] = {c.id: [] for c in self.categories}
+        for product in self.products:
+            by_category.setdefault(product.category_id, []).append(product)
+        self.products_by_category = MappingProxyType(
+            {category_id: tuple(items) for category_id, items in by_category.items()}
+        )
+        self.related_by_id = MappingProxyType(compute_related(self.products, self.products_by_category))
+
+        # Content hash rather than the version counter: every worker counts
+        # versions on its own, but identical data must produce the same ETag.
+        # Sorted by id, because a refreshed snapshot appends new rows where a
+        # full load returns them in table order.
+        digest = hashlib.blake2b(digest_size=12)
+        for items in (self.products, self.categories):
+            for item in sorted(items, key=lambda item: item.id):
+                digest.update(item.model_dump_json().encode())
+        for product_id in sorted(self.keywords_by_id):
+            digest.update(f"{product_id}={self.keywords_by_id[product_id]}".encode())
+        self.fingerprint = digest.hexdigest()
+
+    def get_category(self, slug: str) -> Optional[CategoryOut]:
+        return self.categories_by_slug.get(slug)
+
+    def get_product(self, slug: str) -> Optional[ProductOut]:
+        return self.products_by_slug.get(slug)
+
+    def products_in_category(self, category_id: str) -> Tuple[ProductOut, ...]:
+        return self.products_by_category.get(category_id, ())
+
+    def related_products(self, product_id: str) -> Tuple[ProductOut, ...]:
+        return self.related_by_id.get(product_id, ())
+
+    def page_by_slug(
+        self, after: Optional[str], limit: Optional[int]
+    ) -> Tuple[Tuple[ProductOut, ...], Optional[str]]:
+        """Keyset page of products ordered by slug; returns the page and the next cursor."""
+        start = bisect.bisect_right(self.sorted_slugs, after) if after else 0
+        end = len(self.sorted_slugs) if limit is None else min(start + limit, len(self.sorted_slugs))
+        page = self.products_in_slug_order[start:end]
+        next_cursor = self.sorted_slugs[end - 1] if page and end < len(self.sorted_slugs) else None
+        return page, next_cursor
+
+
+# Snapshot loads select plain columns with Core and validate the rows in one
+# TypeAdapter call: no ORM instances, identity map or attribute
+# instrumentation for rows that are only copied into ProductOut anyway
+# (bench_catalog_load.py measures the difference).
+_PRODUCT_FIELDS = tuple(ProductOut.model_fields)
+_PRODUCT_LIST = TypeAdapter(List[ProductOut])
+_CATEGORY_FIELDS = ("id", "name", "slug", "description")
+_CATEGORY_LIST = TypeAdapter(List[CategoryOut])
+
+
+def products_statement(*criteria):
+    """SELECT for the product columns a snapshot needs, filtered by criteria."""
+    table = Product.__table__
+    return select(
+        *[table.c[name] for name in _PRODUCT_FIELDS], table.c.seo_tags, table.c.mumbai_keywords, table.c.change_seq
+    ).where(*criteria)
+
+
+def categories_statement(*criteria):
+    """SELECT for the category columns a snapshot needs, filtered by criteria."""
+    table = Category.__table__
+    return select(*[table.c[name] for name in _CATEGORY_FIELDS], table.c.change_seq).where(*criteria)
+
+
+def read_products(db: Session, *criteria) -> Tuple[List[ProductOut], Dict[str, str], Dict[str, int]]:
+    """Products matching criteria, their search keywords and their change_seq by id."""
+    rows = db.execute(products_statement(*criteria)).all()
+    width = len(_PRODUCT_FIELDS)
+    products = _PRODUCT_LIST.validate_python([dict(zip(_PRODUCT_FIELDS, row)) for row in rows])
+    # SEO tags and area keywords are not part of ProductOut but feed search.
+    keywords = {product.id: " ".join(filter(None, row[width:width + 2])) for product, row in zip(products, rows)}
+    seqs = {product.id: row[width + 2] or 0 for product, row in zip(products, rows)}
+    return products, keywords, seqs
+
+
+def read_categories(db: Session, *criteria) -> Tuple[List[CategoryOut], Dict[str, int]]:
+    """Categories matching criteria (product_count left at 0) and their change_seq by id."""
+    rows = db.execute(categories_statement(*criteria)).all()
+    categories = _CATEGORY_LIST.validate_python([dict(zip(_CATEGORY_FIELDS, row)) for row in rows])
+    seqs = {category.id: row[-1] or 0 for category, row in zip(categories, rows)}
+    return categories, seqs
+
+
+def _with_counts(categories, products) -> List[CategoryOut]:
+    counts: Dict[str, int] = {}
+    for product in products:
+        counts[product.category_id] = counts.get(product.category_id, 0) + 1
+    return [
+        c if c.product_count == counts.get(c.id, 0)
+        else c.model_copy(update={"product_count": counts.get(c.id, 0)})
+        for c in categories
+    ]
+
+
+def load_snapshot(db: Session, version: int) -> CatalogSnapshot:
+    """Read the full catalog with two queries and build a snapshot from it."""
+    built_at = datetime.now(timezone.utc)
+    products, keywords, product_seqs = read_products(db)
+    categories, category_seqs = read_categories(db)
+    return CatalogSnapshot(
+        version,
+        products,
+        _with_counts(categories, products),
+        keywords,
+        built_at,
+        product_seqs,
+        category_seqs,
+    )
+
+
+def _table_state(db: Session, model) -> Tuple[int, int]:
+    """Row count and change_seq sum of a catalog table."""
+    count, total = db.execute(select(func.count(model.id), func.coalesce(func.sum(model.change_seq), 0))).one()
+    return count, total
+
+
+def load_changes(db: Session, base: CatalogSnapshot, version: int) -> Optional[CatalogSnapshot]:
+    """
+    Apply the products and categories written since `base` was built.
+    Returns None when nothing changed. If the result does not account for
+    every row (a delete, or a row committed below base.change_seq), the
+    catalog is loaded in full instead.
+    """
+    built_at = datetime.now(timezone.utc)
+    changed_products, changed_keywords, changed_product_seqs = read_products(db, Product.change_seq > base.change_seq)
+    changed_categories, changed_category_seqs = read_categories(db, Category.change_seq > base.change_seq)
+    product_seqs = {**base.product_seqs, **changed_product_seqs}
+    category_seqs = {**base.category_seqs, **changed_category_seqs}
+    if (
+        _table_state(db, Product) != (len(product_seqs), sum(product_seqs.values()))
+        or _table_state(db, Category) != (len(category_seqs), sum(category_seqs.values()))
+    ):
+        return load_snapshot(db, version)
+    if not changed_products and not changed_categories:
+        return None
+
+    products = dict(base.products_by_id)
+    products.update((p.id, p) for p in changed_products)
+    categories = dict(base.categories_by_id)
+    categories.update((c.id, c) for c in changed_categories)
+    keywords = dict(base.keywords_by_id)
+    keywords.update(changed_keywords)
+    return CatalogSnapshot(
+        version,
+        list(products.values()),
+        _with_counts(categories.values(), products.values()),
+        keywords,
+        built_at,
+        product_seqs,
+        category_seqs,
+    )
+
+
+class CatalogCache:
+    """Holds the current snapshot and swaps it atomically on rebuild."""
+
+    def __init__(self, session_factory=SessionLocal, freshness_interval: Optional[float] = None):
+        self._session_factory = session_factory
+        # When set, reads refresh the snapshot at most this often (seconds);
+        # used where no catalog_sync thread follows other workers' writes.
+        self.freshness_interval = freshness_interval
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.refreshes = 0
+        self.freshness_checks = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def change_seq(self) -> Optional[int]:
+        """change_seq of the loaded snapshot; None until one is built."""
+        snapshot = self._snapshot
+        return snapshot.change_seq if snapshot else None
+
+    def get(self) -> CatalogSnapshot:
+        """Return the current snapshot, building it on first use."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            if self._freshness_due():
+                snapshot = self._check_freshness()
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        with self._lock:
+            # Another thread may have rebuilt while we waited for the lock.
+            if self._snapshot is not None:
+                return self._snapshot
+            return self._rebuild_locked()
+
+    async def aget(self) -> CatalogSnapshot:
+        """Like get(), but builds a missing snapshot off the event loop."""
+        snapshot = self._snapshot
+        if snapshot is not None and not self._freshness_due():
+            self.hits += 1
+            return snapshot
+        if snapshot is not None:
+            snapshot = await run_in_threadpool(self._check_freshness)
+            self.hits += 1
+            return snapshot
+        return await run_in_threadpool(self.get)
+
+    def rebuild(self) -> CatalogSnapshot:
+        """Load a fresh snapshot from the database and publish it."""
+        with self._lock:
+            return self._rebuild_locked()
+
+    def refresh(self) -> Optional[CatalogSnapshot]:
+        """
+        Bring a loaded snapshot up to date with the database, reading only
+        rows written since it was built. Returns the snapshot in use, or None
+        if none is loaded yet (the next read builds it).
+        """
+        with self._lock:
+            current = self._snapshot
+            if current is None:
+                return None
+            db = self._session_factory()
+            try:
+                snapshot = load_changes(db, current, self._version + 1)
+            finally:
+                db.close()
+            if snapshot is None:
+                return current
+            self._publish(snapshot)
+            self.refreshes += 1
+            return snapshot
+
+    def _freshness_due(self) -> bool:
+        """Whether this read should check for writes from other workers; claims the check."""
+        if self.freshness_interval is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked_at < self.freshness_interval:
+            return False
+        # Claimed without the lock: at worst two readers check at once
+        self._checked_at = now
+        return True
+
+    def _check_freshness(self) -> CatalogSnapshot:
+        self.freshness_checks += 1
+        try:
+            snapshot = self.refresh()
+        except Exception:
+            logger.warning("Catalog freshness check failed; serving the current snapshot", exc_info=True)
+            snapshot = None
+        return snapshot or self.get()
+
+    def _rebuild_locked(self) -> CatalogSnapshot:
+        db = self._session_factory()
+        try:
+            snapshot = load_snapshot(db, self._version + 1)
+        finally:
+            db.close()
+        self._publish(snapshot)
+        self.rebuilds += 1
+        return snapshot
+
+    def _publish(self, snapshot: CatalogSnapshot) -> None:
+        self._version = snapshot.version
+        self._snapshot = snapshot
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot so the next read rebuilds it."""
+        self._snapshot = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": self._version,
+            "change_seq": snapshot.change_seq if snapshot else None,
+            "fingerprint": snapshot.fingerprint if snapshot else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+            "refreshes": self.refreshes,
+            "freshness_checks": self.freshness_checks,
+            "products": len(snapshot.products) if snapshot else 0,
+            "categories": len(snapshot.categories) if snapshot else 0,
+        }
+
+
+catalog_cache = CatalogCache()
+
+
+def mark_catalog_dirty(session: Session) -> None:
+    """Flag a session so its next commit rebuilds the catalog snapshot."""
+    session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _track_catalog_writes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _CATALOG_MODELS):
+            mark_catalog_dirty(session)
+            return
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_catalog_bulk_writes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_arguments.get("mapper")
+        if mapper is not None and mapper.class_ in _CATALOG_MODELS:
+            mark_catalog_dirty(orm_execute_state.session)
+
+
+def notify_catalog_changed(bind) -> None:
+    """Tell other workers (PostgreSQL LISTEN) that the catalog moved on."""
+    if bind.dialect.name != "postgresql":
+        return  # SQLite workers poll instead
+    with bind.begin() as conn:
+        conn.execute(
+            text(
+                "SELECT pg_notify(:channel, CAST(GREATEST("
+                "(SELECT COALESCE(MAX(change_seq), 0) FROM products), "
+                "(SELECT COALESCE(MAX(change_seq), 0) FROM categories)) AS TEXT))"
+            ),
+            {"channel": CATALOG_CHANNEL},
+        )
+
+
+def _refresh_and_notify() -> None:
+    try:
+        catalog_cache.refresh()
+    except Exception:
+        # Never fail the caller's commit; the next read reloads the catalog.
+        catalog_cache.invalidate()
+    try:
+        notify_catalog_changed(get_engine())
+    except Exception:
+        # Listeners reconcile on reconnect, and SQLite pollers never need this
+        logger.warning("Could not publish catalog change", exc_info=True)
+
+
+class _BackgroundRefresh:
+    """Runs refreshes requested from the event loop on one worker thread, coalescing bursts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queued = False
+        self._executor = None
+
+    def submit(self) -> None:
+        with self._lock:
+            # A queued run has not read the database yet, so it covers this commit too
+            if self._queued:
+                return
+            self._queued = True
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-refresh")
+        self._executor.submit(self._run)
+
+    def _run(self) -> None:
+        with self._lock:
+            self._queued = False
+        _refresh_and_notify()
+
+
+_background_refresh = _BackgroundRefresh()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+@event.listens_for(Session, "after_commit")
+def _refresh_catalog_on_commit(session):
+    if not session.info.pop(_DIRTY_KEY, False):
+        return
+    if _on_event_loop():
+        # An AsyncSession commit: refreshing here would block the loop
+        _background_refresh.submit()
+    else:
+        _refresh_and_notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_catalog_flag(session):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,186 @@
+"""
+Cross-worker catalog invalidation.
+
+Every worker keeps its own catalog snapshot (app.services.catalog). A commit
+that touches the catalog refreshes the committing worker's snapshot and, on
+PostgreSQL, sends NOTIFY on CATALOG_CHANNEL with the new change_seq. This
+module runs one background thread per worker that follows those writes and
+refreshes the local snapshot, reading only the rows changed since it was
+built:
+
+    postgresql  LISTEN on a dedicated connection (psycopg2). Every wakeup
+                refreshes once, however many notifications it carries: a
+                payload at or below the snapshot's change_seq may still be a
+                late commit (see app.models.change), which the refresh's
+                completeness check picks up. After every (re)connect the
+                snapshot is refreshed once, so notifications missed while
+                disconnected are not lost.
+    sqlite      PRAGMA data_version on a dedicated connection, checked every
+                CATALOG_SYNC_POLL_SECONDS; it changes whenever another
+                connection commits to the database file. Lead writes move it
+                too, which costs one indexed no-op refresh.
+    other       refresh every CATALOG_SYNC_POLL_SECONDS.
+
+With sync disabled (the default on Vercel, where instances are not long
+lived enough for a thread) nothing follows other instances' writes, so
+catalog reads refresh the snapshot themselves, at most every
+CATALOG_FRESHNESS_SECONDS.
+
+Scripts such as update_images.py need nothing extra: their commits notify
+(PostgreSQL) or bump data_version (SQLite) like any other writer.
+
+Configured via environment:
+    CATALOG_SYNC_ENABLED       - "true"/"false"; defaults to off on Vercel,
+                                 where background threads do not outlive the request
+    CATALOG_SYNC_POLL_SECONDS  - polling interval where LISTEN is unavailable (default 1.0)
+    CATALOG_SYNC_CHANNEL       - NOTIFY channel (default catalog_changed)
+    CATALOG_FRESHNESS_SECONDS  - with sync disabled, how stale a read may be (default 5)
+"""
+import logging
+import os
+import select
+import threading
+
+from app.core.database import get_engine
+from app.services.catalog import CATALOG_CHANNEL, CatalogCache, catalog_cache
+
+logger = logging.getLogger(__name__)
+
+# How long a LISTEN connection may sit idle before it is pinged
+_LISTEN_PING_SECONDS = 30.0
+_RECONNECT_DELAY_SECONDS = (1.0, 30.0)
+
+
+class CatalogSync:
+    """Background thread that keeps one worker's catalog snapshot current."""
+
+    def __init__(
+        self,
+        cache: CatalogCache = catalog_cache,
+        engine_factory=get_engine,
+        enabled: bool = True,
+        poll_interval: float = 1.0,
+        channel: str = CATALOG_CHANNEL,
+    ):
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.channel = channel
+        self._cache = cache
+        self._engine_factory = engine_factory
+        self._stop = threading.Event()
+        self._thread = None
+        self.mode = None
+        self.notifications = 0
+        self.checks = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def start(self) -> None:
+        """Start the listener thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="catalog-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._stop.set()
+        # A LISTEN thread may sit in select() until the next ping; it is a
+        # daemon thread, so do not hold up shutdown for it.
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "notifications": self.notifications,
+            "checks": self.checks,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+        }
+
+    def _run(self) -> None:
+        delay = _RECONNECT_DELAY_SECONDS[0]
+        while not self._stop.is_set():
+            try:
+                engine = self._engine_factory()
+                connection = self._connect(engine)
+                try:
+                    delay = _RECONNECT_DELAY_SECONDS[0]
+                    if self.mode == "listen":
+                        self._listen(connection)
+                    else:
+                        self._poll(connection)
+                finally:
+                    connection.close()
+            except Exception:
+                self.errors += 1
+                logger.warning("Catalog sync failed; retrying in %.0fs", delay, exc_info=True)
+                self._stop.wait(delay)
+                delay = min(delay * 2, _RECONNECT_DELAY_SECONDS[1])
+
+    def _connect(self, engine):
+        """A dedicated DBAPI connection, outside the pool: LISTEN state must not leak into it."""
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        connection = engine.dialect.connect(*cargs, **cparams)
+        dialect = engine.dialect.name
+        if dialect == "postgresql" and hasattr(connection, "notifies"):
+            self.mode = "listen"
+        elif dialect == "sqlite":
+            self.mode = "data_version"
+        else:
+            self.mode = "poll"
+        return connection
+
+    def _refresh(self) -> None:
+        """Refresh the snapshot, if one is loaded."""
+        self.checks += 1
+        if self._cache.change_seq is None:
+            return
+        before = self._cache.version
+        self._cache.refresh()
+        if self._cache.version != before:
+            self.refreshes += 1
+
+    def _listen(self, connection) -> None:
+        connection.autocommit = True
+        cursor = connection.cursor()
+        cursor.execute(f'LISTEN "{self.channel}"')
+        self._refresh()  # catch up on anything committed while not listening
+        while not self._stop.is_set():
+            if select.select([connection], [], [], _LISTEN_PING_SECONDS) == ([], [], []):
+                cursor.execute("SELECT 1")  # surfaces a dead connection
+                continue
+            connection.poll()
+            count = len(connection.notifies)
+            connection.notifies.clear()
+            if not count:
+                continue
+            self.notifications += count
+            self._refresh()
+
+    def _poll(self, connection) -> None:
+        cursor = connection.cursor()
+        last_version = None
+        while not self._stop.wait(self.poll_interval):
+            if self.mode == "data_version":
+                cursor.execute("PRAGMA data_version")
+                version = cursor.fetchone()[0]
+                if version == last_version:
+                    continue
+                last_version = version
+            self._refresh()
+
+
+catalog_sync = CatalogSync(
+    enabled=os.getenv("CATALOG_SYNC_ENABLED", "false" if os.getenv("VERCEL") else "true").strip().lower()
+    in ("1", "true", "yes", "on"),
+    poll_interval=float(os.getenv("CATALOG_SYNC_POLL_SECONDS", "1.0")),
+)
+
+if not catalog_sync.enabled:
+    catalog_cache.freshness_interval = float(os.getenv("CATALOG_FRESHNESS_SECONDS", "5"))
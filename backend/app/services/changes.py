@@ -0,0 +1,89 @@
+"""
+Change feed over products, categories and leads.
+
+Every write stamps the row with updated_at and the next number from the
+global change sequence (see app.models.change), indexed per table. A client
+keeps the highest sequence number it has seen and asks for everything after
+it, so incremental sync costs one index range scan per table, proportional
+to what changed rather than to the table size.
+
+Rows are reported in their current state, once per feed page, however many
+times they changed. Deletes are not tracked; the API has no delete routes.
+
+On PostgreSQL numbers come from a sequence without a lock, so a transaction
+can commit a number below one a client has already seen. There next_since
+only moves past rows written at least CHANGE_FEED_SETTLE_SECONDS ago
+(default 30). Newer rows are still returned, and are sent again on the next
+page. A write is only missed if its transaction stays open longer than the
+settle window.
+"""
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.lead import Lead
+from app.models.product import Product
+from app.schemas.category import CategoryOut
+from app.schemas.change import ChangeFeed, ChangeOut
+from app.schemas.lead import LeadOut
+from app.schemas.product import ProductOut
+
+SETTLE_SECONDS = float(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "30"))
+
+# Feed table name -> (model, schema for the row data)
+TRACKED = {
+    "products": (Product, ProductOut),
+    "categories": (Category, CategoryOut),
+    "leads": (Lead, LeadOut),
+}
+
+
+def parse_tables(tables: Optional[str]) -> List[str]:
+    """Validate a comma-separated table list; all tracked tables when empty."""
+    if not tables:
+        return list(TRACKED)
+    names = [name.strip() for name in tables.split(",") if name.strip()]
+    unknown = [name for name in names if name not in TRACKED]
+    if unknown:
+        raise ValueError(f"Unknown table(s): {', '.join(unknown)}. Choose from: {', '.join(TRACKED)}")
+    return names
+
+
+def changes_statement(table: str, since: int, limit: int):
+    """SELECT for the first `limit` rows of `table` written after `since`, in sequence order."""
+    model, _ = TRACKED[table]
+    return select(model).where(model.change_seq > since).order_by(model.change_seq).limit(limit)
+
+
+def _table_changes(db: Session, table: str, since: int, limit: int) -> Iterable[ChangeOut]:
+    _, schema = TRACKED[table]
+    rows = db.execute(changes_statement(table, since, limit)).scalars()
+    for row in rows:
+        yield ChangeOut(
+            seq=row.change_seq,
+            table=table,
+            id=row.id,
+            updated_at=row.updated_at,
+            data=schema.model_validate(row).model_dump(mode="json"),
+        )
+
+
+def changes_since(db: Session, since: int, limit: int, tables: List[str]) -> ChangeFeed:
+    """The first `limit` changes after `since`, across tables, in sequence order."""
+    # limit + 1 per table tells whether anything is left after this page
+    per_table = [list(_table_changes(db, table, since, limit + 1)) for table in tables]
+    merged = list(heapq.merge(*per_table, key=lambda change: change.seq))
+    page = merged[:limit]
+    next_since = page[-1].seq if page else since
+    has_more = len(merged) > limit
+    if page and db.get_bind().dialect.name == "postgresql":
+        settled_before = datetime.utcnow() - timedelta(seconds=SETTLE_SECONDS)
+        next_since = max((c.seq for c in page if c.updated_at <= settled_before), default=since)
+        # Rows past the cursor come back on the next call, so "more" only means more settled rows
+        has_more = has_more and next_since == page[-1].seq
+    return ChangeFeed(changes=page, next_since=next_since, has_more=has_more)
@@ -0,0 +1,165 @@
+"""
+Ingest-time lead deduplication.
+
+Popups, call and WhatsApp buttons fire again every time the same visitor
+comes back. Leads are keyed on the normalized phone number plus product; a
+repeat within LEAD_DEDUP_WINDOW_MINUTES of the first enquiry is merged into
+that lead's hit_count instead of inserting a new row.
+
+Recent keys live in a bounded in-process LRU, so a repeat that lands on the
+same worker needs no database round trip. On a miss (another worker took
+the first enquiry, or the LRU was reset by a restart), the ix_leads_dedup_key
+index answers the same question with one indexed lookup; both compare the
+product trimmed and lowercased. A key is only
+remembered once its lead is stored (or queued), so a hit never points at a
+lead that does not exist.
+
+Configured via environment:
+    LEAD_DEDUP_WINDOW_MINUTES - merge window (default 60, 0 disables dedup)
+    LEAD_DEDUP_CAPACITY       - max keys remembered per worker (default 50000)
+"""
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.lead import Lead, normalized_product
+from app.schemas.lead import LeadCreate, LeadOut
+
+_NON_DIGITS = re.compile(r"\D+")
+
+
+def normalize_phone(phone: str) -> str:
+    """Digits only, dropping the +91 / 0 trunk prefix from Indian numbers."""
+    digits = _NON_DIGITS.sub("", phone or "")
+    return digits[-10:] if len(digits) > 10 else digits
+
+
+def new_lead_record(data: LeadCreate) -> dict:
+    """Build the full row for a new lead, with server-assigned id and timestamps."""
+    now = datetime.utcnow()
+    return {
+        **data.model_dump(),
+        "id": str(uuid.uuid4()),
+        "created_at": now,
+        "phone_normalized": normalize_phone(data.phone),
+        "hit_count": 1,
+        "last_seen_at": now,
+    }
+
+
+class LeadDeduplicator:
+    """Bounded LRU of recent leads keyed on (normalized phone, product)."""
+
+    def __init__(self, window: timedelta, capacity: int):
+        self.window = window
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._recent: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self.merged = 0
+        self.unique = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > timedelta(0) and self.capacity > 0
+
+    @staticmethod
+    def key(phone_normalized: str, product: Optional[str]) -> Tuple[str, str]:
+        # Same normalization as normalized_product() in SQL
+        return phone_normalized, (product or "").strip().lower()
+
+    def cached(self, record: dict) -> Optional[LeadOut]:
+        """
+        The lead this record repeats, if this worker has it in the LRU; its
+        hit count is bumped. None on a miss, which lookup_statement() settles.
+        """
+        if not self.enabled or not record["phone_normalized"]:
+            return None
+        key = self.key(record["phone_normalized"], record["product"])
+        with self._lock:
+            existing = self._recent.get(key)
+            if existing is None or record["created_at"] - existing["created_at"] >= self.window:
+                return None
+            existing["hit_count"] += 1
+            existing["last_seen_at"] = record["created_at"]
+            self._recent.move_to_end(key)
+            self.merged += 1
+            return LeadOut(**existing)
+
+    def lookup_statement(self, record: dict):
+        """Newest stored lead with the record's phone and product inside the window (ix_leads_dedup_key)."""
+        if not self.enabled or not record["phone_normalized"]:
+            return None
+        return dedup_statement(record["phone_normalized"], record["product"], record["created_at"] - self.window)
+
+    def found(self, record: dict, row) -> LeadOut:
+        """Register a lead found by lookup_statement() as the one this record repeats."""
+        existing = dict(row._mapping)
+        existing["hit_count"] = (existing.get("hit_count") or 1) + 1
+        existing["last_seen_at"] = record["created_at"]
+        with self._lock:
+            self._remember(self.key(record["phone_normalized"], record["product"]), existing)
+            self.merged += 1
+        return LeadOut(**existing)
+
+    def find(self, db: Session, record: dict) -> Optional[LeadOut]:
+        """The lead this record repeats: the LRU first, then the index."""
+        duplicate = self.cached(record)
+        if duplicate is not None:
+            return duplicate
+        statement = self.lookup_statement(record)
+        if statement is None:
+            return None
+        row = db.execute(statement).first()
+        return self.found(record, row) if row is not None else None
+
+    def remember(self, record: dict) -> None:
+        """Remember a lead once it is stored or queued, so repeats are merged into it."""
+        if not self.enabled or not record["phone_normalized"]:
+            return
+        with self._lock:
+            self._remember(self.key(record["phone_normalized"], record["product"]), record)
+            self.unique += 1
+
+    def _remember(self, key: Tuple[str, str], record: dict) -> None:
+        self._recent[key] = {name: record[name] for name in LeadOut.model_fields}
+        self._recent[key]["hit_count"] = record.get("hit_count") or 1
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.capacity:
+            self._recent.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self._recent),
+            "merged": self.merged,
+            "unique": self.unique,
+        }
+
+
+def dedup_statement(phone_normalized: str, product: Optional[str], since: datetime):
+    """SELECT behind the dedup check, served by ix_leads_dedup_key."""
+    columns = [getattr(Lead, name) for name in LeadOut.model_fields]
+    _, product_key = LeadDeduplicator.key(phone_normalized, product)
+    return (
+        select(*columns)
+        .where(
+            Lead.phone_normalized == phone_normalized,
+            normalized_product(Lead.product) == product_key,
+            Lead.created_at >= since,
+        )
+        .order_by(Lead.created_at.desc())
+        .limit(1)
+    )
+
+
+lead_dedup = LeadDeduplicator(
+    window=timedelta(minutes=int(os.getenv("LEAD_DEDUP_WINDOW_MINUTES", "60"))),
+    capacity=int(os.getenv("LEAD_DEDUP_CAPACITY", "50000")),
+)
@@ -0,0 +1,397 @@
+"""
+Batched lead ingestion.
+
+create_lead validates the payload, assigns the id and created_at on the server
+and hands the row to this queue, which acknowledges immediately. A background
+thread group-commits pending leads with one executemany INSERT per batch,
+flushing when the batch is full or the oldest lead has waited
+LEAD_FLUSH_INTERVAL_MS. Duplicate enquiries merged by lead_dedup are applied
+as hit_count increments in the same transaction.
+
+A batch that fails is retried row by row. Rows the database rejects
+(constraint or data errors) go to a dead-letter file, so one bad lead cannot
+hold back the rest. If the database itself is unavailable, the remaining
+rows are appended to a local spill file and replayed by the flush thread
+with exponential backoff; leads still pending at shutdown are spilled too
+and replayed on the next start. A spill being replayed is renamed to
+<spill>.replaying and only deleted once every lead in it is committed or
+spilled again; inserts skip ids that already exist, so replaying the same
+file twice after a crash is harmless.
+
+Configured via environment:
+    LEAD_QUEUE_ENABLED       - "true"/"false"; defaults to off on Vercel, where
+                               background threads do not outlive the request
+    LEAD_BATCH_SIZE          - max leads per INSERT (default 200)
+    LEAD_FLUSH_INTERVAL_MS   - max time a lead waits before flushing (default 250)
+    LEAD_SPILL_PATH          - spill file location (default backend/lead_spill.jsonl)
+    LEAD_DEAD_LETTER_PATH    - rejected leads (default backend/lead_dead_letter.jsonl)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.core.database import SessionLocal
+from app.models.change import allocate_change_seqs
+from app.models.lead import Lead
+from app.schemas.lead import LeadOut
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_SPILL_PATH = Path(__file__).resolve().parents[2] / "lead_spill.jsonl"
+_DEFAULT_DEAD_LETTER_PATH = Path(__file__).resolve().parents[2] / "lead_dead_letter.jsonl"
+
+# The row itself is bad; retrying it cannot succeed
+_POISON_ERRORS = (IntegrityError, DataError)
+_RETRY_BACKOFF_SECONDS = (0.5, 30.0)
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class LeadQueue:
+    """Accepts leads without touching the database and writes them in batches."""
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        enabled: bool = True,
+        batch_size: int = 200,
+        flush_interval: float = 0.25,
+        spill_path: Path = _DEFAULT_SPILL_PATH,
+        dead_letter_path: Path = _DEFAULT_DEAD_LETTER_PATH,
+    ):
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = Path(spill_path)
+        self.replay_path = self.spill_path.with_name(self.spill_path.name + ".replaying")
+        self.dead_letter_path = Path(dead_letter_path)
+        self._session_factory = session_factory
+        self._pending: Deque[dict] = deque()
+        self._pending_by_id: Dict[str, dict] = {}
+        self._hits: Dict[str, Tuple[int, datetime]] = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopping = False
+        # Replayed leads not yet committed or spilled again
+        self._replay_ids = set()
+        self._replay_hits = False
+        self._retry_at: Optional[float] = None
+        self._backoff = _RETRY_BACKOFF_SECONDS[0]
+        self.accepted = 0
+        self.written = 0
+        self.batches = 0
+        self.spilled = 0
+        self.retries = 0
+        self.dead_lettered = 0
+
+    def submit(self, record: dict) -> LeadOut:
+        """Queue a new lead row and return it as it will be stored."""
+        self.start()
+        with self._cond:
+            self._pending.append(record)
+            self._pending_by_id[record["id"]] = record
+            self.accepted += 1
+            # Wakes the flusher to start the latency timer, or to flush a full batch
+            self._cond.notify()
+        return LeadOut(**record)
+
+    def record_hit(self, lead_id: str, seen_at: datetime) -> None:
+        """Count a repeat enquiry against an existing (possibly still queued) lead."""
+        self.start()
+        with self._cond:
+            pending = self._pending_by_id.get(lead_id)
+            if pending is not None:
+                pending["hit_count"] += 1
+                pending["last_seen_at"] = seen_at
+                return
+            count, _ = self._hits.get(lead_id, (0, seen_at))
+            self._hits[lead_id] = (count + 1, seen_at)
+            self._cond.notify()
+
+    def start(self) -> None:
+        """Queue any spilled leads for replay and start the flush thread (idempotent)."""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._load_spill()
+            self._thread = threading.Thread(target=self._run, name="lead-queue", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still pending, spilling to disk if the database is unavailable."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            self._cond.notify()
+        thread.join(timeout)
+        with self._cond:
+            leftover = list(self._pending)
+            hits = dict(self._hits)
+            self._pending.clear()
+            self._pending_by_id.clear()
+            self._hits.clear()
+            self._thread = None
+        if leftover or hits:
+            self._spill(leftover, hits)
+        with self._cond:
+            # Whatever was left of a replay is in the spill file now
+            if self._replay_ids or self._replay_hits:
+                self._replay_ids.clear()
+                self._replay_hits = False
+                self.replay_path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": len(self._pending),
+            "pending_hits": len(self._hits),
+            "accepted": self.accepted,
+            "written": self.written,
+            "batches": self.batches,
+            "spilled": self.spilled,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+        }
+
+    def _retry_due(self) -> bool:
+        return self._retry_at is not None and time.monotonic() >= self._retry_at
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not (self._pending or self._hits or self._stopping or self._retry_due()):
+                    timeout = None if self._retry_at is None else max(self._retry_at - time.monotonic(), 0)
+                    self._cond.wait(timeout)
+                # A replay still in flight is always pending here; the retry
+                # waits until it is done
+                if self._retry_due() and not self._stopping and not (self._replay_ids or self._replay_hits):
+                    self._retry_at = None
+                    self.retries += 1
+                    self._load_spill()
+                if not self._pending and not self._hits:
+                    if self._stopping:
+                        return
+                    continue
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                count = min(self.batch_size, len(self._pending))
+                batch = [self._pending.popleft() for _ in range(count)]
+                for record in batch:
+                    del self._pending_by_id[record["id"]]
+                # Hits for leads in this batch are already folded into the rows,
+                # so the UPDATEs below only touch leads committed earlier.
+                hits, self._hits = self._hits, {}
+            self._write(batch, hits)
+            with self._cond:
+                self._finish_replay(batch, hits)
+
+    def _write(self, batch: List[dict], hits: Dict[str, Tuple[int, datetime]]) -> None:
+        try:
+            self._commit(batch, hits)
+        except Exception as e:
+            logger.warning("Failed to write %d leads as one batch, retrying row by row: %s", len(batch), e)
+            self._write_rows(batch, hits)
+            return
+        self.written += len(batch)
+        self.batches += 1
+        self._backoff = _RETRY_BACKOFF_SECONDS[0]
+
+    def _commit(self, batch: List[dict], hits: Dict[str, Tuple[int, datetime]]) -> None:
+        db = self._session_factory()
+        try:
+            # One block of change sequence numbers for the whole batch;
+            # copies keep them out of the records spilled on failure
+            seqs = iter(allocate_change_seqs(db.connection(), len(batch) + len(hits)))
+            if batch:
+                db.execute(_insert_statement(db.get_bind().dialect.name), [
+                    {**record, "change_seq": next(seqs)} for record in batch
+                ])
+            if hits:
+                db.execute(_HIT_UPDATE, [
+                    {"lead_id": lead_id, "hits": count, "seen_at": seen_at, "seq": next(seqs)}
+                    for lead_id, (count, seen_at) in hits.items()
+                ])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write_rows(self, batch: List[dict], hits: Dict[str, Tuple[int, datetime]]) -> None:
+        """Write a failed batch one row at a time, dead-lettering rows the database rejects."""
+        for index, record in enumerate(batch):
+            try:
+                self._commit([record], {})
+            except _POISON_ERRORS as e:
+                self._dead_letter(record, e)
+            except Exception as e:
+                # The database is unavailable, not the row: keep the rest for a retry
+                self._spill_for_retry(batch[index:], hits, e)
+                return
+            else:
+                self.written += 1
+        if hits:
+            try:
+                self._commit([], hits)
+            except _POISON_ERRORS as e:
+                for lead_id, (count, seen_at) in hits.items():
+                    self._dead_letter({"hit": lead_id, "hits": count, "seen_at": seen_at}, e)
+            except Exception as e:
+                self._spill_for_retry([], hits, e)
+
+    def _spill_for_retry(self, records: List[dict], hits: Dict[str, Tuple[int, datetime]], error: Exception) -> None:
+        self._spill(records, hits)
+        with self._cond:
+            delay = self._backoff
+            self._backoff = min(self._backoff * 2, _RETRY_BACKOFF_SECONDS[1])
+            self._retry_at = time.monotonic() + delay
+        logger.error("Failed to write %d leads, spilled to %s, retrying in %.1fs: %s",
+                     len(records), self.spill_path, delay, error)
+
+    def _dead_letter(self, entry: dict, error: Exception) -> None:
+        logger.error("Lead rejected by the database, moved to %s: %s", self.dead_letter_path, error)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**entry, "error": str(error)}, default=_isoformat) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.dead_lettered += 1
+
+    def _spill(self, records: List[dict], hits: Dict[str, Tuple[int, datetime]]) -> None:
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, default=_isoformat) + "\n")
+            for lead_id, (count, seen_at) in hits.items():
+                f.write(json.dumps({"hit": lead_id, "hits": count, "seen_at": seen_at}, default=_isoformat) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.spilled += len(records)
+
+    def _load_spill(self) -> None:
+        """Queue spilled leads for another attempt (called with the lock held)."""
+        if self.spill_path.exists():
+            if self.replay_path.exists():
+                # A replay interrupted by a crash: replay both files together
+                with open(self.replay_path, "a", encoding="utf-8") as out:
+                    out.write(self.spill_path.read_text(encoding="utf-8"))
+                    out.flush()
+                    os.fsync(out.fileno())
+                self.spill_path.unlink()
+            else:
+                os.replace(self.spill_path, self.replay_path)
+        if not self.replay_path.exists():
+            return
+        records, hits = self._read_spill(self.replay_path)
+        records = [r for r in records if r["id"] not in self._pending_by_id]
+        if not records and not hits:
+            self.replay_path.unlink()
+            return
+        logger.info("Replaying %d spilled leads from %s", len(records), self.replay_path)
+        # Retried leads go out first, in their original order
+        self._pending.extendleft(reversed(records))
+        self._pending_by_id.update((r["id"], r) for r in records)
+        for lead_id, (count, seen_at) in hits.items():
+            pending_count, _ = self._hits.get(lead_id, (0, seen_at))
+            self._hits[lead_id] = (pending_count + count, seen_at)
+        self._replay_ids = {r["id"] for r in records}
+        self._replay_hits = bool(hits)
+        self._cond.notify()
+
+    def _finish_replay(self, batch: List[dict], hits: Dict[str, Tuple[int, datetime]]) -> None:
+        """Delete the replay file once every replayed lead is committed or spilled again."""
+        if not self._replay_ids and not self._replay_hits:
+            return
+        self._replay_ids.difference_update(record["id"] for record in batch)
+        if hits:
+            # Replayed hits were merged into the first hits batch after the load
+            self._replay_hits = False
+        if not self._replay_ids and not self._replay_hits:
+            self.replay_path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _read_spill(path: Path) -> Tuple[List[dict], Dict[str, Tuple[int, datetime]]]:
+        records, hits, seen = [], {}, set()
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "hit" in entry:
+                    count, _ = hits.get(entry["hit"], (0, None))
+                    hits[entry["hit"]] = (count + entry["hits"], datetime.fromisoformat(entry["seen_at"]))
+                    continue
+                if entry["id"] in seen:
+                    continue
+                seen.add(entry["id"])
+                for field in ("created_at", "last_seen_at"):
+                    if entry.get(field):
+                        entry[field] = datetime.fromisoformat(entry[field])
+                # Every row in one executemany must carry the same columns
+                entry.setdefault("phone_normalized", None)
+                entry.setdefault("hit_count", 1)
+                entry.setdefault("last_seen_at", entry["created_at"])
+                records.append(entry)
+        return records, hits
+
+
+def _isoformat(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+_leads = Lead.__table__
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _insert_statement(dialect: str):
+    """INSERT for a batch of leads that skips ids already stored (replays are idempotent)."""
+    insert = _INSERTS.get(dialect)
+    if insert is None:
+        return _leads.insert()
+    return insert(_leads).on_conflict_do_nothing(index_elements=[_leads.c.id])
+
+_HIT_UPDATE = (
+    _leads.update()
+    .where(_leads.c.id == bindparam("lead_id"))
+    .values(
+        hit_count=_leads.c.hit_count + bindparam("hits"),
+        last_seen_at=bindparam("seen_at"),
+        change_seq=bindparam("seq"),
+    )
+)
+
+
+lead_queue = LeadQueue(
+    enabled=_env_flag("LEAD_QUEUE_ENABLED", default=not os.getenv("VERCEL")),
+    batch_size=int(os.getenv("LEAD_BATCH_SIZE", "200")),
+    flush_interval=int(os.getenv("LEAD_FLUSH_INTERVAL_MS", "250")) / 1000,
+    spill_path=Path(os.getenv("LEAD_SPILL_PATH", str(_DEFAULT_SPILL_PATH))),
+    dead_letter_path=Path(os.getenv("LEAD_DEAD_LETTER_PATH", str(_DEFAULT_DEAD_LETTER_PATH))),
+)
@@ -0,0 +1,133 @@
+"""
+Pre-serialized catalog responses.
+
+The hot catalog routes return the same bytes until the next catalog write, so
+each body is JSON-encoded once per snapshot, compressed once per encoding,
+and served as a raw Response without response_model validation or JSON
+encoding. A new snapshot starts with an empty store; a body is rebuilt on
+the first request after a write, in the threadpool, because max-quality
+brotli on the full product list takes a few hundred milliseconds.
+
+Bodies are only materialized for keys that exist in the snapshot, so the
+store stays bounded by the size of the catalog.
+"""
+import threading
+from typing import Callable, Dict, List, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from starlette.concurrency import run_in_threadpool
+
+from app.core.compression import SUPPORTED_ENCODINGS, compress, negotiate_encoding
+from app.schemas.category import CategoryOut
+from app.schemas.product import ProductOut
+
+_PRODUCT_LIST = TypeAdapter(List[ProductOut])
+_CATEGORY_LIST = TypeAdapter(List[CategoryOut])
+
+
+def encode_products(products) -> bytes:
+    return _PRODUCT_LIST.dump_json(list(products))
+
+
+def encode_categories(categories) -> bytes:
+    return _CATEGORY_LIST.dump_json(list(categories))
+
+
+def encode_model(model) -> bytes:
+    return model.model_dump_json().encode()
+
+
+class MaterializedBody:
+    """One response body with every supported Content-Encoding precomputed."""
+
+    __slots__ = ("identity", "encoded")
+
+    def __init__(self, identity: bytes):
+        self.identity = identity
+        self.encoded: Dict[str, bytes] = {
+            encoding: compress(identity, encoding) for encoding in SUPPORTED_ENCODINGS
+        }
+
+    def select(self, accept_encoding: Optional[str]):
+        """Return (body, encoding) for the client's Accept-Encoding."""
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            return self.identity, None
+        body = self.encoded[encoding]
+        # Tiny bodies can come out larger once compressed
+        if len(body) >= len(self.identity):
+            return self.identity, None
+        return body, encoding
+
+
+class ResponseStore:
+    """Materialized bodies for the newest catalog snapshot, keyed by route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._bodies: Dict[str, MaterializedBody] = {}
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, snapshot, key: str) -> Optional[MaterializedBody]:
+        if snapshot.version != self._version:
+            return None
+        body = self._bodies.get(key)
+        if body is not None:
+            self.hits += 1
+        return body
+
+    def build(self, snapshot, key: str, encode: Callable[[], bytes]) -> MaterializedBody:
+        with self._lock:
+            if snapshot.version == self._version and key in self._bodies:
+                return self._bodies[key]
+        body = MaterializedBody(encode())
+        with self._lock:
+            self.builds += 1
+            if snapshot.version > self._version:
+                # First body for a newer snapshot: everything else is stale
+                self._version = snapshot.version
+                self._bodies = {}
+            if snapshot.version == self._version:
+                self._bodies[key] = body
+        return body
+
+    def stats(self) -> dict:
+        bodies = list(self._bodies.values())
+        return {
+            "version": self._version,
+            "entries": len(bodies),
+            "hits": self.hits,
+            "builds": self.builds,
+            "identity_bytes": sum(len(b.identity) for b in bodies),
+            "encoded_bytes": sum(len(v) for b in bodies for v in b.encoded.values()),
+        }
+
+
+response_store = ResponseStore()
+
+
+async def materialized_response(
+    request: Request,
+    response: Response,
+    snapshot,
+    key: str,
+    encode: Callable[[], bytes],
+) -> Response:
+    """
+    Serve a catalog body from the store, building it off the event loop on a
+    miss. Headers already set on the route's response (validators,
+    Cache-Control) are carried over.
+    """
+    body = response_store.get(snapshot, key)
+    if body is None:
+        body = await run_in_threadpool(response_store.build, snapshot, key, encode)
+    content, encoding = body.select(request.headers.get("accept-encoding"))
+    raw = Response(content=content, media_type="application/json")
+    raw.headers.update(response.headers)
+    raw.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        raw.headers["Content-Encoding"] = encoding
+    return raw
@@ -0,0 +1,171 @@
+"""
+Bulk product upsert.
+
+A batch is checked with one set-based lookup (known categories) and then
+written with INSERT ... ON CONFLICT (slug) DO UPDATE, all in the caller's
+transaction. Existing products keep their id, and only the fields present
+in an incoming record are replaced; fields it omits keep their stored
+value. Records are grouped by the set of fields they carry, one statement
+per group. Rows that fail validation are reported back individually and do
+not stop the rest of the batch.
+
+Whether a row was created or updated is read back from the database, so a
+slug inserted concurrently by another writer is reported as updated, with
+its stored id: RETURNING (xmax = 0) on PostgreSQL, and on SQLite, which
+holds the write lock for the rest of the transaction once the upsert ran,
+the stored ids compared to the ones proposed.
+"""
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Sequence, Set, Tuple
+
+from sqlalchemy import literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.change import allocate_change_seqs
+from app.models.product import Product
+from app.schemas.product import BulkProductResponse, BulkProductResult, ProductCreate
+from app.services.catalog import mark_catalog_dirty
+
+MAX_ITEMS = 5000
+
+# Stay well under SQLite's bound-parameter limit for IN (...) lookups
+_LOOKUP_CHUNK = 500
+
+# Rows per multi-VALUES statement on PostgreSQL, well under its bound-parameter limit
+_UPSERT_CHUNK = 1000
+
+_PRICE_FIELDS = ("price_1month", "price_2month", "price_3month")
+
+# Replaced on every upsert, whatever fields the record carries
+_ALWAYS_SET = ("updated_at", "change_seq")
+
+_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def _chunks(values: Sequence, size: int = _LOOKUP_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _known_categories(db: Session, category_ids: Set[str]) -> Set[str]:
+    known = set()
+    for chunk in _chunks(sorted(category_ids)):
+        known.update(db.execute(select(Category.id).where(Category.id.in_(chunk))).scalars())
+    return known
+
+
+def _existing_slugs(db: Session, slugs: Set[str]) -> Dict[str, str]:
+    existing = {}
+    for chunk in _chunks(sorted(slugs)):
+        existing.update(db.execute(select(Product.slug, Product.id).where(Product.slug.in_(chunk))).all())
+    return existing
+
+
+def upsert_statement(dialect: str, fields: Iterable[str]):
+    """INSERT ... ON CONFLICT (slug) DO UPDATE of `fields` for the given dialect."""
+    insert = _INSERTS.get(dialect)
+    if insert is None:
+        raise ValueError(f"Bulk upsert is not supported on {dialect}")
+    table = Product.__table__
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.slug],
+        set_={name: stmt.excluded[name] for name in (*fields, *_ALWAYS_SET) if name not in ("id", "slug")},
+    )
+
+
+def _write(db: Session, dialect: str, statement, rows: List[dict]) -> Dict[str, Tuple[str, bool]]:
+    """Upsert rows; slug -> (stored id, whether the row was inserted)."""
+    table = Product.__table__
+    if dialect == "postgresql":
+        # xmax is 0 on a row version this statement inserted, not on one it updated
+        stored = {}
+        for chunk in _chunks(rows, _UPSERT_CHUNK):
+            returned = db.execute(
+                statement.values(chunk).returning(table.c.slug, table.c.id, literal_column("xmax = 0").label("inserted"))
+            )
+            stored.update((slug, (product_id, inserted)) for slug, product_id, inserted in returned)
+        return stored
+
+    db.execute(statement, rows)
+    # Every row proposed a fresh id; a conflicting row kept its own.
+    proposed = {row["slug"]: row["id"] for row in rows}
+    return {
+        slug: (product_id, product_id == proposed[slug])
+        for slug, product_id in _existing_slugs(db, set(proposed)).items()
+    }
+
+
+def bulk_upsert(db: Session, items: List[ProductCreate]) -> BulkProductResponse:
+    """
+    Validate and upsert a batch of products on the session's transaction.
+    The caller commits; the catalog snapshot is rebuilt on that commit.
+    """
+    known_categories = _known_categories(db, {item.category_id for item in items})
+
+    results: List[BulkProductResult] = []
+    pending = []
+    seen: Set[str] = set()
+    for index, item in enumerate(items):
+        if item.slug in seen:
+            error = f"Duplicate slug '{item.slug}' in request"
+        elif item.category_id not in known_categories:
+            error = f"Category with id '{item.category_id}' not found"
+        else:
+            error = None
+        if error:
+            results.append(BulkProductResult(index=index, slug=item.slug, status="error", error=error))
+            continue
+        seen.add(item.slug)
+
+        # The full row is what a new product is inserted with; only the
+        # fields the client sent are written over an existing one.
+        fields = tuple(sorted(item.model_dump(exclude_unset=True)))
+        row = item.model_dump()
+        for field in _PRICE_FIELDS:
+            if row[field] is None:
+                row[field] = 0
+        row["id"] = str(uuid.uuid4())
+        pending.append((index, row, fields))
+
+    if pending:
+        # One block of change sequence numbers instead of one per row
+        seqs = allocate_change_seqs(db.connection(), len(pending))
+        now = datetime.utcnow()
+        groups = defaultdict(list)
+        for (_, row, fields), seq in zip(pending, seqs):
+            row["change_seq"] = seq
+            row["updated_at"] = now
+            groups[fields].append(row)
+
+        dialect = db.get_bind().dialect.name
+        stored: Dict[str, Tuple[str, bool]] = {}
+        for fields, rows in groups.items():
+            stored.update(_write(db, dialect, upsert_statement(dialect, fields), rows))
+        # Core inserts do not go through the unit of work, so after_flush
+        # never sees these rows.
+        mark_catalog_dirty(db)
+
+        for index, row, _ in pending:
+            product_id, inserted = stored[row["slug"]]
+            results.append(BulkProductResult(
+                index=index,
+                slug=row["slug"],
+                status="created" if inserted else "updated",
+                id=product_id,
+            ))
+        results.sort(key=lambda result: result.index)
+
+    return BulkProductResponse(
+        created=sum(r.status == "created" for r in results),
+        updated=sum(r.status == "updated" for r in results),
+        failed=sum(r.status == "error" for r in results),
+        results=results,
+    )
@@ -0,0 +1,156 @@
+"""
+Related-product recommendations, precomputed for the whole catalog.
+
+Neighbours are computed once per catalog snapshot (i.e. after every catalog
+write) and looked up by product id, so a product page never queries for them.
+Products in the same category always rank first; within that, and for
+filling up from other categories when a category is too small, candidates are
+scored on
+
+- price proximity across the 1/2/3-month rental prices, and
+- TF-IDF cosine similarity of key_features and description tokens.
+
+Only a bounded set of candidates is scored per product: its nearest
+neighbours by monthly price, plus products sharing a reasonably specific
+token (tokens found in more than MAX_POSTINGS products nominate nobody). A
+catalog of a few dozen products is still compared exhaustively, while a
+supplier onboarding thousands of items into one category stays close to
+linear.
+"""
+import bisect
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from app.schemas.product import ProductOut
+
+RELATED_LIMIT = 4
+
+PRICE_WEIGHT = 0.5
+TEXT_WEIGHT = 0.5
+
+# Price neighbours considered on each side of a product
+PRICE_WINDOW = 25
+# Tokens shared by more products than this are too common to nominate candidates
+MAX_POSTINGS = 200
+
+_PRICE_FIELDS = ("price_1month", "price_2month", "price_3month")
+_TOKEN_RE = re.compile(r"[a-z0-9]{3,}")
+_STOPWORDS = frozenset(
+    "and the for with are this that from your you our can all has have its into "
+    "per not any also more than use used using which while when where will".split()
+)
+
+
+def _tokens(product: ProductOut) -> List[str]:
+    text = f"{product.key_features or ''} {product.description or ''}".lower()
+    return [token for token in _TOKEN_RE.findall(text) if token not in _STOPWORDS]
+
+
+def _tfidf_vectors(products: Sequence[ProductOut]) -> Dict[str, Dict[str, float]]:
+    """Unit-length TF-IDF vectors keyed by product id."""
+    counts = {p.id: Counter(_tokens(p)) for p in products}
+    document_frequency = Counter(token for tokens in counts.values() for token in tokens)
+    total = len(products)
+    vectors = {}
+    for product_id, tokens in counts.items():
+        weights = {
+            token: (1 + math.log(count)) * math.log((1 + total) / (1 + document_frequency[token]))
+            for token, count in tokens.items()
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        vectors[product_id] = {token: w / norm for token, w in weights.items() if w > 0}
+    return vectors
+
+
+def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(token, 0.0) for token, weight in a.items())
+
+
+def _price_similarity(a: ProductOut, b: ProductOut) -> float:
+    scores = []
+    for field in _PRICE_FIELDS:
+        x, y = getattr(a, field) or 0, getattr(b, field) or 0
+        if x > 0 and y > 0:
+            scores.append(1 - abs(x - y) / max(x, y))
+    return sum(scores) / len(scores) if scores else 0.0
+
+
+class _CandidateIndex:
+    """Price-ordered list and token postings for one group of products."""
+
+    def __init__(self, products: Sequence[ProductOut], vectors: Dict[str, Dict[str, float]]):
+        self.by_price = sorted(products, key=_price_key)
+        self.price_keys = [_price_key(p) for p in self.by_price]
+        self.postings: Dict[str, List[ProductOut]] = defaultdict(list)
+        for product in products:
+            for token in vectors[product.id]:
+                self.postings[token].append(product)
+
+    def candidates(self, product: ProductOut, vectors: Dict[str, Dict[str, float]]) -> Iterable[ProductOut]:
+        position = bisect.bisect_left(self.price_keys, _price_key(product))
+        window = self.by_price[max(0, position - PRICE_WINDOW):position + PRICE_WINDOW + 1]
+        found = {p.id: p for p in window}
+        for token in vectors[product.id]:
+            posting = self.postings.get(token, ())
+            if len(posting) <= MAX_POSTINGS:
+                found.update((p.id, p) for p in posting)
+        return found.values()
+
+
+def _price_key(product: ProductOut) -> int:
+    return product.price_1month or 0
+
+
+def _ranked(
+    product: ProductOut,
+    candidates: Iterable[ProductOut],
+    vectors: Dict[str, Dict[str, float]],
+    limit: int,
+) -> List[ProductOut]:
+    scored = [
+        (
+            -(PRICE_WEIGHT * _price_similarity(product, other)
+              + TEXT_WEIGHT * _cosine(vectors[product.id], vectors[other.id])),
+            other.slug,
+            other,
+        )
+        for other in candidates
+        if other.id != product.id
+    ]
+    scored.sort(key=lambda item: item[:2])
+    return [other for _, _, other in scored[:limit]]
+
+
+def compute_related(
+    products: Sequence[ProductOut],
+    products_by_category: Dict[str, Sequence[ProductOut]],
+    limit: int = RELATED_LIMIT,
+) -> Dict[str, Tuple[ProductOut, ...]]:
+    """Best `limit` neighbours for every product, same category first."""
+    vectors = _tfidf_vectors(products)
+    indexes = {
+        category_id: _CandidateIndex(items, vectors)
+        for category_id, items in products_by_category.items()
+    }
+    catalog_index = None
+    related = {}
+    for product in products:
+        index = indexes.get(product.category_id)
+        candidates = index.candidates(product, vectors) if index else ()
+        picks = _ranked(product, candidates, vectors, limit)
+        if len(picks) < limit:
+            if catalog_index is None:
+                catalog_index = _CandidateIndex(products, vectors)
+            others = [
+                p for p in catalog_index.candidates(product, vectors)
+                if p.category_id != product.category_id
+            ]
+            if len(others) < limit - len(picks):
+                others = [p for p in products if p.category_id != product.category_id]
+            picks += _ranked(product, others, vectors, limit - len(picks))
+        related[product.id] = tuple(picks)
+    return related
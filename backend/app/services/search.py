@@ -0,0 +1,317 @@
+"""
+Full-text product search.
+
+SQLite uses an FTS5 virtual table kept in sync by triggers on products and
+categories. PostgreSQL uses a GIN index over products.search_vector, a
+weighted tsvector of the product text and its category name that triggers
+keep current. Both match a term against the product fields and the category
+name alike, and return rows shaped for ProductSearchResult, ranked
+best-first, with prefix matching on every term.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import or_, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import Executable
+
+from app.models.category import Category
+from app.models.product import Product
+from app.schemas.product import ProductSearchResult
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Dialect -> whether the full-text index exists, probed once per process.
+_fts_ready: Dict[str, bool] = {}
+
+_INDEX_PROBES = {
+    "sqlite": "SELECT 1 FROM sqlite_master WHERE name = 'products_fts_keys'",
+    "postgresql": "SELECT 1 FROM pg_indexes WHERE indexname = 'ix_products_search_vector'",
+}
+
+# products has a string primary key, so its rowid is not stable (VACUUM may
+# renumber it). products_fts_keys gives every product an INTEGER PRIMARY KEY,
+# which is what products_fts rows are keyed on.
+_SQLITE_SETUP = [
+    """
+    CREATE TABLE IF NOT EXISTS products_fts_keys (
+        id INTEGER PRIMARY KEY,
+        product_id VARCHAR NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, category, seo_tags, keywords, key_features, description,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT OR IGNORE INTO products_fts_keys(product_id) VALUES (new.id);
+        INSERT INTO products_fts(rowid, name, category, seo_tags, keywords, key_features, description)
+        VALUES ((SELECT id FROM products_fts_keys WHERE product_id = new.id),
+                new.name, (SELECT name FROM categories WHERE id = new.category_id),
+                new.seo_tags, new.mumbai_keywords, new.key_features, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = (SELECT id FROM products_fts_keys WHERE product_id = old.id);
+        DELETE FROM products_fts_keys WHERE product_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+        DELETE FROM products_fts WHERE rowid = (SELECT id FROM products_fts_keys WHERE product_id = old.id);
+        UPDATE products_fts_keys SET product_id = new.id WHERE product_id = old.id;
+        INSERT OR IGNORE INTO products_fts_keys(product_id) VALUES (new.id);
+        INSERT INTO products_fts(rowid, name, category, seo_tags, keywords, key_features, description)
+        VALUES ((SELECT id FROM products_fts_keys WHERE product_id = new.id),
+                new.name, (SELECT name FROM categories WHERE id = new.category_id),
+                new.seo_tags, new.mumbai_keywords, new.key_features, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS categories_fts_au AFTER UPDATE OF name ON categories BEGIN
+        UPDATE products_fts SET category = new.name
+        WHERE rowid IN (
+            SELECT k.id FROM products p JOIN products_fts_keys k ON k.product_id = p.id
+            WHERE p.category_id = new.id
+        );
+    END
+    """,
+]
+
+_SQLITE_BACKFILL = [
+    "INSERT OR IGNORE INTO products_fts_keys(product_id) SELECT id FROM products",
+    """
+    INSERT INTO products_fts(rowid, name, category, seo_tags, keywords, key_features, description)
+    SELECT k.id, p.name, c.name, p.seo_tags, p.mumbai_keywords, p.key_features, p.description
+    FROM products p
+    JOIN products_fts_keys k ON k.product_id = p.id
+    LEFT JOIN categories c ON c.id = p.category_id
+    """,
+]
+
+# Everything _SQLITE_SETUP creates, including the rowid-keyed first version
+_SQLITE_TEARDOWN = [
+    "DROP TRIGGER IF EXISTS products_fts_ai",
+    "DROP TRIGGER IF EXISTS products_fts_ad",
+    "DROP TRIGGER IF EXISTS products_fts_au",
+    "DROP TRIGGER IF EXISTS categories_fts_au",
+    "DROP TABLE IF EXISTS products_fts",
+    "DROP TABLE IF EXISTS products_fts_keys",
+]
+
+# bm25 column weights follow the products_fts column order above.
+_SQLITE_SEARCH = """
+    SELECT p.id, p.name, p.slug, p.price_1month, p.image_url, p.youtube_url,
+           c.name AS category_name, c.slug AS category_slug
+    FROM products_fts
+    JOIN products_fts_keys k ON k.id = products_fts.rowid
+    JOIN products p ON p.id = k.product_id
+    JOIN categories c ON c.id = p.category_id
+    WHERE products_fts MATCH :query
+    ORDER BY bm25(products_fts, 10.0, 5.0, 3.0, 2.0, 2.0, 1.0)
+    LIMIT :limit
+"""
+
+# products.search_vector folds the category name into the product document,
+# so one GIN index answers the whole query. Triggers keep it current for
+# every writer, ORM or not, and for category renames.
+_PG_SETUP = [
+    """
+    CREATE OR REPLACE FUNCTION products_search_vector() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(
+                (SELECT name FROM categories WHERE id = NEW.category_id), '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.seo_tags, '') || ' ' ||
+                coalesce(NEW.mumbai_keywords, '')), 'B') ||
+            setweight(to_tsvector('simple', coalesce(NEW.key_features, '') || ' ' ||
+                coalesce(NEW.description, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS products_search_vector ON products",
+    """
+    CREATE TRIGGER products_search_vector
+    BEFORE INSERT OR UPDATE OF name, category_id, seo_tags, mumbai_keywords, key_features, description
+    ON products FOR EACH ROW EXECUTE PROCEDURE products_search_vector()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION categories_search_vector() RETURNS trigger AS $$
+    BEGIN
+        -- Listing name in SET fires products_search_vector for each product
+        UPDATE products SET name = name WHERE category_id = NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS categories_search_vector ON categories",
+    """
+    CREATE TRIGGER categories_search_vector
+    AFTER UPDATE OF name ON categories FOR EACH ROW
+    WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE categories_search_vector()
+    """,
+]
+
+_PG_BACKFILL = "UPDATE products SET name = name WHERE search_vector IS NULL"
+
+_PG_SEARCH = """
+    SELECT p.id, p.name, p.slug, p.price_1month, p.image_url, p.youtube_url,
+           c.name AS category_name, c.slug AS category_slug
+    FROM products p
+    JOIN categories c ON c.id = p.category_id,
+         to_tsquery('simple', :query) AS q
+    WHERE p.search_vector @@ q
+    ORDER BY ts_rank(p.search_vector, q) DESC
+    LIMIT :limit
+"""
+
+
+def create_search_index(op) -> None:
+    """Create the full-text index for op's dialect (used by the search index migrations)."""
+    if op.dialect == "sqlite":
+        fts5 = op.connection.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar()
+        if not fts5:
+            # Search falls back to ILIKE on SQLite builds without FTS5
+            op.log("SQLite was built without FTS5; skipping the full-text index")
+            return
+        existed = op.connection.execute(text(_INDEX_PROBES["sqlite"])).first()
+        for statement in _SQLITE_SETUP:
+            op.execute(statement)
+        if not existed:
+            for statement in _SQLITE_BACKFILL:
+                op.execute(statement)
+    elif op.dialect == "postgresql":
+        op.add_column("products", "search_vector", "TSVECTOR")
+        for statement in _PG_SETUP:
+            op.execute(statement)
+        op.execute(_PG_BACKFILL)
+        op.create_index("ix_products_search_vector", "products", "search_vector", using="GIN")
+    else:
+        return
+    # Probe again on the next search
+    _fts_ready.pop(op.dialect, None)
+
+
+def rebuild_search_index(op) -> None:
+    """Replace an earlier version of the full-text index with the current one."""
+    if op.dialect == "sqlite":
+        for statement in _SQLITE_TEARDOWN:
+            op.execute(statement)
+    elif op.dialect == "postgresql":
+        # Expression index over the product columns only, without the category
+        op.drop_index("ix_products_search")
+    create_search_index(op)
+
+
+def _probe_search_index(conn: Connection) -> bool:
+    """Check whether the search index migration has run on this database."""
+    dialect = conn.dialect.name
+    if dialect not in _fts_ready:
+        probe = _INDEX_PROBES.get(dialect)
+        _fts_ready[dialect] = bool(probe) and conn.execute(text(probe)).first() is not None
+    return _fts_ready[dialect]
+
+
+def _tokens(q: str) -> List[str]:
+    return _TOKEN_RE.findall(q.lower())
+
+
+def _row_to_result(row) -> ProductSearchResult:
+    return ProductSearchResult(
+        id=row.id,
+        name=row.name,
+        slug=row.slug,
+        category_name=row.category_name,
+        category_slug=row.category_slug,
+        price_1month=row.price_1month,
+        image_url=row.image_url,
+        youtube_url=row.youtube_url
+    )
+
+
+def _ilike_statement(q: str, limit: int):
+    search_term = f"%{q.lower()}%"
+    return (
+        select(
+            Product.id,
+            Product.name,
+            Product.slug,
+            Product.price_1month,
+            Product.image_url,
+            Product.youtube_url,
+            Category.name.label("category_name"),
+            Category.slug.label("category_slug")
+        )
+        .join(Category, Product.category_id == Category.id)
+        .where(
+            or_(
+                Product.name.ilike(search_term),
+                Category.name.ilike(search_term)
+            )
+        )
+        .limit(limit)
+    )
+
+
+def fts_statement(dialect: str, q: str, limit: int) -> Optional[Tuple[Executable, dict]]:
+    """
+    Full-text statement and parameters ranking products against every term
+    in q, with term prefixes matched so partial words typed into the search
+    box still hit. None when q has no searchable words or the dialect has no
+    full-text search.
+    """
+    tokens = _tokens(q)
+    if not tokens:
+        return None
+    if dialect == "sqlite":
+        query = " ".join(f'"{token}"*' for token in tokens)
+        return text(_SQLITE_SEARCH), {"query": query, "limit": limit}
+    if dialect == "postgresql":
+        query = " & ".join(f"{token}:*" for token in tokens)
+        return text(_PG_SEARCH), {"query": query, "limit": limit}
+    return None
+
+
+def build_search(dialect: str, q: str, limit: int) -> Optional[Tuple[Executable, dict]]:
+    """
+    Statement and parameters for a product search: the full-text index when
+    it exists, ILIKE otherwise. Returns None when q has no searchable words.
+    """
+    if not _fts_ready.get(dialect):
+        return _ilike_statement(q, limit), {}
+    return fts_statement(dialect, q, limit)
+
+
+def search_products(db: Session, q: str, limit: int = 20) -> List[ProductSearchResult]:
+    """Run the full-text search on a sync session."""
+    dialect = db.get_bind().dialect.name
+    if dialect not in _fts_ready:
+        _probe_search_index(db.connection())
+    search = build_search(dialect, q, limit)
+    if search is None:
+        return []
+    statement, params = search
+    return [_row_to_result(row) for row in db.execute(statement, params)]
+
+
+async def search_products_async(db: AsyncSession, q: str, limit: int = 20) -> List[ProductSearchResult]:
+    """Run the full-text search on an async session."""
+    dialect = db.bind.dialect.name
+    if dialect not in _fts_ready:
+        await db.run_sync(lambda session: _probe_search_index(session.connection()))
+    search = build_search(dialect, q, limit)
+    if search is None:
+        return []
+    statement, params = search
+    result = await db.execute(statement, params)
+    return [_row_to_result(row) for row in result]
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Catalog load benchmark.
+Fills a temporary SQLite database with a synthetic catalog (20k products by
+default) and times the Core read path in app/services/catalog.py (plain
+column rows validated in one TypeAdapter call) against the previous ORM
+path (full Product instances copied into ProductOut one by one).
+
+Only the database read and serialization are timed; building the snapshot
+indexes and related products afterwards is the same for both paths.
+
+    python bench_catalog_load.py
+    python bench_catalog_load.py --products 50000 --rounds 5
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.category import Category
+from app.models.product import Product
+from app.schemas.category import CategoryOut
+from app.schemas.product import ProductOut
+from app.services.catalog import read_categories, read_products
+
+_WORDS = (
+    "oxygen concentrator portable silent battery backup hospital bed motorized recliner "
+    "mattress cpap bipap ventilator suction pump monitor icu home care rental mumbai"
+).split()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def build_catalog(engine, products, categories, seed=7):
+    rng = random.Random(seed)
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    category_ids = [str(uuid.uuid4()) for _ in range(categories)]
+    with engine.begin() as conn:
+        conn.execute(Category.__table__.insert(), [
+            {"id": category_id, "name": f"Category {i}", "slug": f"category-{i}",
+             "description": _text(rng, 20), "updated_at": now, "change_seq": i}
+            for i, category_id in enumerate(category_ids, 1)
+        ])
+        conn.execute(Product.__table__.insert(), [
+            {
+                "id": str(uuid.uuid4()),
+                "name": f"{_text(rng, 3).title()} {i}",
+                "slug": f"product-{i}",
+                "category_id": rng.choice(category_ids),
+                "price_1month": rng.randint(500, 20000),
+                "price_2month": rng.randint(500, 20000),
+                "price_3month": rng.randint(500, 20000),
+                "image_url": f"/images/product-{i}.jpg",
+                "description": _text(rng, 60),
+                "specifications": _text(rng, 30),
+                "key_features": "\n".join(f"• {_text(rng, 6)}" for _ in range(8)),
+                "seo_meta_title": _text(rng, 8),
+                "seo_meta_description": _text(rng, 25),
+                "seo_tags": ", ".join(_text(rng, 2) for _ in range(20)),
+                "mumbai_keywords": ", ".join(_text(rng, 2) for _ in range(20)),
+                "updated_at": now,
+                "change_seq": categories + i,
+            }
+            for i in range(1, products + 1)
+        ])
+
+
+def orm_read(db):
+    """The ORM read path this module replaced, kept as the benchmark baseline."""
+    rows = db.query(Product).all()
+    products = [ProductOut.model_validate(p) for p in rows]
+    keywords = {p.id: " ".join(filter(None, (p.seo_tags, p.mumbai_keywords))) for p in rows}
+    categories = [
+        CategoryOut(id=c.id, name=c.name, slug=c.slug, description=c.description)
+        for c in db.query(Category).all()
+    ]
+    return products, keywords, categories
+
+
+def core_read(db):
+    products, keywords, _ = read_products(db)
+    categories, _ = read_categories(db)
+    return products, keywords, categories
+
+
+def _time(label, read, session_factory, rounds, rows):
+    best = float("inf")
+    for _ in range(rounds):
+        db = session_factory()
+        try:
+            started = time.perf_counter()
+            result = read(db)
+            best = min(best, time.perf_counter() - started)
+        finally:
+            db.close()
+    print(f"{label:<30} {best * 1000:8.1f} ms  {best / rows * 1e6:6.2f} µs/row")
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=20_000, help="synthetic products (default 20000)")
+    parser.add_argument("--categories", type=int, default=40, help="synthetic categories (default 40)")
+    parser.add_argument("--rounds", type=int, default=5, help="timed rounds; the best is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="catalog-bench-") as directory:
+        engine = create_engine(f"sqlite:///{Path(directory) / 'catalog.db'}")
+        print(f"Building a catalog of {args.products} products in {args.categories} categories...")
+        build_catalog(engine, args.products, args.categories)
+        session_factory = sessionmaker(bind=engine)
+        rows = args.products + args.categories
+        print()
+
+        orm, orm_time = _time("ORM (Product -> ProductOut)", orm_read, session_factory, args.rounds, rows)
+        core, core_time = _time("Core rows + TypeAdapter", core_read, session_factory, args.rounds, rows)
+        engine.dispose()
+
+        mismatches = sum(old != new for old, new in zip(orm[0], core[0]))
+        mismatches += orm[1] != core[1]
+        mismatches += sum(old != new for old, new in zip(orm[2], core[2]))
+        print(f"\nCore path: {orm_time / core_time:.2f}x the ORM path, "
+              f"{(orm_time - core_time) / rows * 1e6:.2f} µs less per row; {mismatches} mismatching records")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Product info parser benchmark.
+Generates a synthetic corpus shaped like "Product info/Product N.txt" (10k
+files by default, a few in latin-1) and times the streaming parser in
+app/services/product_info.py against the previous read-split-scan parser,
+then against itself in a process pool.
+
+    python bench_product_info.py
+    python bench_product_info.py --files 2000 --rounds 5 --workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from app.services.product_info import SECTION_HEADERS, parse_product_file
+
+_WORDS = (
+    "oxygen concentrator portable silent battery backup hospital bed motorized recliner "
+    "mattress cpap bipap ventilator suction pump monitor icu home care rental mumbai "
+    "bandra juhu colaba powai andheri worli delivery sanitized certified technician"
+).split()
+
+
+def _sentence(rng, words):
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _product_text(rng, index):
+    lines = [f"Synthetic Product {index} {rng.choice(_WORDS).title()}"]
+    for header, (field, _) in SECTION_HEADERS.items():
+        lines.append(header)
+        if field == "key_features":
+            lines += [f"- {_sentence(rng, 6)}" for _ in range(rng.randint(6, 12))]
+        elif field in ("seo_tags", "mumbai_keywords"):
+            lines += [", ".join(_sentence(rng, 3)[:-1] for _ in range(30)) for _ in range(3)]
+        else:
+            lines += [_sentence(rng, rng.randint(12, 60)) for _ in range(rng.randint(1, 3))]
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_corpus(directory, count, seed=7):
+    rng = random.Random(seed)
+    paths = []
+    for index in range(1, count + 1):
+        text = _product_text(rng, index)
+        if index % 20 == 0:
+            # Older supplier files are latin-1 with the odd degree sign
+            data = text.replace("Synthetic", "Synthetic 360°", 1).encode("latin-1")
+        else:
+            data = text.encode("utf-8")
+        path = Path(directory) / f"Product {index}.txt"
+        path.write_bytes(data)
+        paths.append(path)
+    return paths
+
+
+def legacy_parse(file_path):
+    """The parser this module replaced, kept as the benchmark baseline."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        with open(file_path, 'r', encoding='latin-1') as f:
+            content = f.read()
+    headers = list(SECTION_HEADERS)
+    product_info, current_section, section_content = {}, None, []
+
+    def flush():
+        if current_section == 'Key Features:':
+            product_info['key_features'] = '\n'.join(f'• {item.strip("- •")}' for item in section_content if item.strip())
+        elif current_section in ('SEO Tags (80-90)', 'Mumbai Posh-Area Keywords (80-90)'):
+            product_info[current_section] = ', '.join(item.strip() for item in section_content if item.strip())
+        else:
+            product_info[current_section.lower().replace(' ', '_').replace('-', '_')] = '\n'.join(section_content).strip()
+
+    for line in content.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        if line in headers:
+            if current_section and section_content:
+                flush()
+            current_section, section_content = line, []
+        elif current_section:
+            section_content.append(line)
+        elif not product_info.get('name'):
+            product_info['name'] = line
+    if current_section and section_content:
+        flush()
+    return product_info
+
+
+def _time(label, parse, paths, rounds, total_bytes):
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        results = parse(paths)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<28} {best:7.3f}s  {len(paths) / best:9,.0f} files/s  "
+          f"{total_bytes / best / 1e6:6.1f} MB/s")
+    return results, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=10_000, help="corpus size (default 10000)")
+    parser.add_argument("--rounds", type=int, default=3, help="timed rounds; the best is reported")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes for the pool run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="product-info-bench-") as directory:
+        print(f"Building {args.files} synthetic product files...")
+        paths = build_corpus(directory, args.files)
+        total_bytes = sum(p.stat().st_size for p in paths)
+        print(f"Corpus: {total_bytes / 1e6:.1f} MB\n")
+
+        legacy, legacy_time = _time("legacy (read + split + scan)", lambda ps: [legacy_parse(p) for p in ps],
+                                    paths, args.rounds, total_bytes)
+        streamed, streamed_time = _time("streaming", lambda ps: [parse_product_file(p) for p in ps],
+                                        paths, args.rounds, total_bytes)
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            chunksize = max(1, len(paths) // (args.workers * 4))
+            _time(f"streaming, {args.workers} processes",
+                  lambda ps: list(pool.map(parse_product_file, ps, chunksize=chunksize)),
+                  paths, args.rounds, total_bytes)
+
+        mismatches = sum(
+            old.get("name") != new.name or old.get("customer_friendly_short_description") != new.description
+            for old, new in zip(legacy, streamed)
+        )
+        print(f"\nStreaming parser: {legacy_time / streamed_time:.2f}x the legacy parser; "
+              f"{mismatches} mismatching records")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
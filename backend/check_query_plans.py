@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Query plan regression check.
+Runs EXPLAIN for the SQL behind each database read path, built by the
+same functions the routes and services execute, against the configured
+DATABASE_URL (SQLite or PostgreSQL) and fails if a query that should be
+answered from an index falls back to a full table scan.
+
+Run after `python migrate.py`; exits non-zero on any regression.
+
+On PostgreSQL sequential scans are disabled for the check, since the planner
+rightly prefers them on small tables; the question is whether an index *can*
+serve the query.
+"""
+
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
+
+from app.core.database import get_engine
+from app.core.pagination import encode_cursor
+from app.models.category import Category
+from app.models.product import Product
+from app.routes.leads import leads_page_statement
+from app.services.catalog import categories_statement, products_statement
+from app.services.changes import TRACKED, changes_statement
+from app.services.lead_dedup import dedup_statement
+from app.services.lead_export import export_statement
+from app.services.search import fts_statement
+
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+
+# Category pages, product pages and related products are served from the
+# in-memory catalog snapshot (app.services.catalog); on those tables the
+# database only sees the snapshot's incremental refresh, checked below.
+#
+# name -> (statement, indexes that may serve it (None: any index), tables allowed a full scan)
+CHECKS = {
+    "lead listing (first page)": (
+        leads_page_statement(100, None, None),
+        {"ix_leads_created_at_id"},
+        set(),
+    ),
+    "lead listing (next page)": (
+        leads_page_statement(100, encode_cursor(datetime.utcnow(), SAMPLE_ID), None),
+        {"ix_leads_created_at_id"},
+        set(),
+    ),
+    "lead export": (
+        export_statement(datetime.utcnow(), None, "website"),
+        {"ix_leads_created_at_id"},
+        set(),
+    ),
+    "lead dedup lookup": (
+        dedup_statement("9820000000", "sample", datetime.utcnow()),
+        {"ix_leads_dedup_key"},
+        set(),
+    ),
+    "catalog refresh (products)": (
+        products_statement(Product.change_seq > 0),
+        {"ix_products_change_seq"},
+        set(),
+    ),
+    "catalog refresh (categories)": (
+        categories_statement(Category.change_seq > 0),
+        {"ix_categories_change_seq"},
+        set(),
+    ),
+}
+CHECKS.update({
+    f"change feed ({table})": (
+        changes_statement(table, 0, 500),
+        {f"ix_{table}_change_seq"},
+        set(),
+    )
+    for table in TRACKED
+})
+
+
+def search_check(conn):
+    """The full-text product search as the route builds it once the index exists."""
+    statement, params = fts_statement(conn.dialect.name, "oxygen concentrator", 20)
+    return (
+        statement.bindparams(**params),
+        {"products_fts", "ix_products_search_vector"},
+        set(),
+    )
+
+
+def _compile(conn, statement):
+    compiled = statement.compile(dialect=conn.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    return str(compiled), params
+
+
+def sqlite_plan(conn, statement):
+    """Return (indexes used, tables scanned without an index)."""
+    sql, params = _compile(conn, statement)
+    indexes, scanned = set(), set()
+    for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params):
+        detail = row[-1]
+        words = detail.split()
+        if "VIRTUAL" in words:
+            indexes.add(words[1])  # an FTS table answers MATCH from its own index
+        elif "INDEX" in words:
+            indexes.add(words[words.index("INDEX") + 1])
+        elif words[:1] == ["SCAN"] and len(words) > 1:
+            scanned.add(words[1])
+    return indexes, scanned
+
+
+def postgres_plan(conn, statement):
+    sql, params = _compile(conn, statement)
+    indexes, scanned = set(), set()
+    trans = conn.begin()
+    try:
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+    finally:
+        trans.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        if "Index Name" in node:
+            indexes.add(node["Index Name"])
+        elif node.get("Node Type") == "Seq Scan":
+            scanned.add(node["Relation Name"])
+        nodes.extend(node.get("Plans", []))
+    return indexes, scanned
+
+
+def main():
+    engine = get_engine()
+    print(f"Checking query plans on {engine.url.render_as_string(hide_password=True)}...")
+    explain = {"sqlite": sqlite_plan, "postgresql": postgres_plan}.get(engine.dialect.name)
+    if explain is None:
+        print(f"Unsupported database: {engine.dialect.name}")
+        return 2
+
+    failures = 0
+    with engine.connect() as conn:
+        checks = {**CHECKS, "product search": search_check(conn)}
+        for name, (statement, expected, allowed_scans) in checks.items():
+            try:
+                indexes, scanned = explain(conn, statement)
+            except Exception as e:
+                # e.g. the full-text index is missing
+                failures += 1
+                print(f"✗ {name}: {str(e).splitlines()[0]}")
+                continue
+            unexpected_scans = scanned - allowed_scans
+            used = indexes if expected is None else indexes & expected
+            if used and not unexpected_scans:
+                print(f"✓ {name}: {', '.join(sorted(used))}")
+                continue
+            failures += 1
+            print(f"✗ {name}: expected {'an index' if expected is None else f'one of {sorted(expected)}'}, "
+                  f"used {sorted(indexes) or 'no index'}"
+                  + (f", full scan of {sorted(unexpected_scans)}" if unexpected_scans else ""))
+
+    if failures:
+        print(f"\n{failures} query plan regression(s)")
+        return 1
+    print("\n✅ All read paths use an index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,32 @@
 #!/usr/bin/env python3
 """
 Dynamic Sitemap Generator for Carespace India
-Generates sitemap.xml with all products, categories, and static pages
+Generates a sitemap index (sitemap.xml) and sitemap files with all products,
+categories, and static pages.
+
+URLs are streamed from the database straight into the sitemap files, which
+roll over at the protocol limits (50,000 URLs or 50 MB uncompressed per
+file). Product and category lastmod come from updated_at, so crawlers only
+re-fetch pages that changed. When no product or category changed since the
+last run (same row counts and newest updated_at), nothing is rewritten;
+otherwise only files whose content differs are replaced.
+
+    python generate_sitemap.py            # sitemap-N.xml
+    python generate_sitemap.py --gzip     # sitemap-N.xml.gz
+    python generate_sitemap.py --force    # rebuild even if nothing changed
+
+Configured via environment:
+    SITEMAP_BASE_URL   - public site URL (default https://carespace.in)
 """
+import argparse
+import gzip
+import hashlib
+import os
+import re
 import sys
-from pathlib import Path
 from datetime import datetime
-import os
+from pathlib import Path
+from xml.sax.saxutils import escape
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -14,85 +34,269 @@ load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
 
 # No need to modify sys.path since we're already in the backend directory
 
+from sqlalchemy import func, select
+
 from app.core.database import SessionLocal
 from app.models.product import Product
 from app.models.category import Category
 
-def generate_sitemap():
-    """Generate sitemap.xml with all content"""
+BASE_URL = os.getenv("SITEMAP_BASE_URL", "https://carespace.in").rstrip("/")
+OUTPUT_DIR = Path(__file__).parent.parent / "Frontend" / "public"
+INDEX_NAME = "sitemap.xml"
+
+# Sitemap protocol limits per file
+MAX_URLS = 50_000
+MAX_BYTES = 50 * 1024 * 1024
+
+BATCH_SIZE = 1000
+
+# Bump when the output format changes, so the next run rewrites everything
+FORMAT_VERSION = 1
+
+STATIC_PAGES = [
+    {"loc": "/", "priority": "1.0", "changefreq": "weekly"},
+    {"loc": "/rent", "priority": "0.8", "changefreq": "monthly"},
+    {"loc": "/about", "priority": "0.7", "changefreq": "monthly"},
+    {"loc": "/contact", "priority": "0.7", "changefreq": "monthly"},
+    {"loc": "/blog", "priority": "0.6", "changefreq": "weekly"},
+    {"loc": "/faq", "priority": "0.6", "changefreq": "monthly"},
+]
+
+_URLSET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+).encode()
+_URLSET_FOOTER = b"</urlset>\n"
+_SHARD_RE = re.compile(r"^sitemap-\d+\.xml(\.gz)?$")
+_FINGERPRINT_RE = re.compile(rb"<!-- fingerprint: ([0-9a-f]+) -->")
+
+
+def w3c_datetime(value):
+    """lastmod value for a naive UTC datetime."""
+    return value.replace(microsecond=0).isoformat() + "+00:00"
+
+
+def url_entry(loc, lastmod=None, changefreq=None, priority=None):
+    parts = [f"  <url>\n    <loc>{escape(BASE_URL + loc)}</loc>\n"]
+    if lastmod is not None:
+        parts.append(f"    <lastmod>{w3c_datetime(lastmod)}</lastmod>\n")
+    if changefreq:
+        parts.append(f"    <changefreq>{changefreq}</changefreq>\n")
+    if priority:
+        parts.append(f"    <priority>{priority}</priority>\n")
+    parts.append("  </url>\n")
+    return "".join(parts).encode()
+
+
+_HASH_CHUNK = 1 << 20
+
+
+def _file_digest(path):
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def _unchanged(path, digest, size):
+    """Whether path already holds `size` bytes hashing to `digest`."""
+    return path.exists() and path.stat().st_size == size and _file_digest(path) == digest
+
+
+def _write_if_changed(path, data):
+    """Replace path with data unless it already holds exactly those bytes."""
+    if _unchanged(path, hashlib.blake2b(data).digest(), len(data)):
+        return False
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+class _HashingFile:
+    """Write-only file wrapper that hashes and counts the bytes passing through."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.digest = hashlib.blake2b()
+        self.size = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.raw.write(data)
+
+    def flush(self):
+        self.raw.flush()
+
+    def close(self):
+        self.raw.close()
+
+
+class ShardedSitemapWriter:
+    """
+    Writes <url> entries to sitemap-1.xml, sitemap-2.xml, ... rolling over
+    at the protocol limits. Each file is streamed to a temporary file,
+    hashed on the way, and only replaces the published one if its bytes
+    changed.
+    """
+
+    def __init__(self, directory, compress=False):
+        self.directory = Path(directory)
+        self.compress = compress
+        self.shards = []  # (file name, newest lastmod, replaced?)
+        self.total_urls = 0
+        self._file = None
+
+    def add(self, loc, lastmod=None, changefreq=None, priority=None):
+        entry = url_entry(loc, lastmod, changefreq, priority)
+        if self._file is None or self._urls >= MAX_URLS or (
+            self._bytes + len(entry) + len(_URLSET_FOOTER) > MAX_BYTES
+        ):
+            self._roll()
+        self._file.write(entry)
+        self._urls += 1
+        self._bytes += len(entry)
+        self.total_urls += 1
+        if lastmod is not None and (self._lastmod is None or lastmod > self._lastmod):
+            self._lastmod = lastmod
+
+    def _roll(self):
+        self._finish()
+        name = f"sitemap-{len(self.shards) + 1}.xml" + (".gz" if self.compress else "")
+        self._path = self.directory / name
+        self._tmp_path = self.directory / f".{name}.tmp"
+        raw = _HashingFile(open(self._tmp_path, "wb"))
+        # mtime=0 keeps gzip output identical for identical content
+        self._file = gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) if self.compress else raw
+        self._raw = raw
+        self._file.write(_URLSET_HEADER)
+        self._urls = 0
+        self._bytes = len(_URLSET_HEADER)
+        self._lastmod = None
+
+    def _finish(self):
+        if self._file is None:
+            return
+        self._file.write(_URLSET_FOOTER)
+        self._file.close()
+        if self._raw is not self._file:
+            self._raw.close()
+        replaced = not _unchanged(self._path, self._raw.digest.digest(), self._raw.size)
+        if replaced:
+            os.replace(self._tmp_path, self._path)
+        else:
+            self._tmp_path.unlink()
+        self.shards.append((self._path.name, self._lastmod, replaced))
+        self._file = None
+
+    def close(self):
+        self._finish()
+
+    def abort(self):
+        if self._file is not None:
+            self._file.close()
+            if self._raw is not self._file:
+                self._raw.close()
+            self._tmp_path.unlink(missing_ok=True)
+            self._file = None
+
+
+def sitemap_index(shards, fingerprint):
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f"<!-- fingerprint: {fingerprint} -->",
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for name, lastmod, _ in shards:
+        lines.append("  <sitemap>")
+        lines.append(f"    <loc>{escape(f'{BASE_URL}/{name}')}</loc>")
+        if lastmod is not None:
+            lines.append(f"    <lastmod>{w3c_datetime(lastmod)}</lastmod>")
+        lines.append("  </sitemap>")
+    lines.append("</sitemapindex>")
+    return ("\n".join(lines) + "\n").encode()
+
+
+def catalog_fingerprint(db, compress):
+    """Changes whenever a product or category is added, edited or deleted."""
+    state = [FORMAT_VERSION, BASE_URL, compress, STATIC_PAGES]
+    for model in (Product, Category):
+        count, newest = db.execute(select(func.count(model.id), func.max(model.updated_at))).one()
+        state += [count, newest.isoformat() if newest else None]
+    return hashlib.blake2b(repr(state).encode(), digest_size=16).hexdigest()
+
+
+def published_fingerprint(directory):
+    index_path = Path(directory) / INDEX_NAME
+    try:
+        with open(index_path, "rb") as f:
+            head = f.read(512)
+    except FileNotFoundError:
+        return None
+    match = _FINGERPRINT_RE.search(head)
+    return match.group(1).decode() if match else None
+
+
+def generate_sitemap(output_dir=OUTPUT_DIR, compress=False, force=False):
+    """Generate the sitemap index and sitemap files with all content"""
+    output_dir = Path(output_dir)
     db = SessionLocal()
+    writer = ShardedSitemapWriter(output_dir, compress)
 
     try:
-        # Get all products (without SEO columns for now)
-        products = db.query(Product.id, Product.name, Product.slug, Product.category_id).all()
-
-        # Get all categories
-        categories = db.query(Category.id, Category.name, Category.slug).all()
-
-        # Base URL
-        base_url = "https://carespace.in"
-
-        # Current date for lastmod
-        current_date = datetime.now().strftime("%Y-%m-%d")
-
-        # Start sitemap
-        sitemap_content = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        sitemap_content += '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
-
-        # Static pages
-        static_pages = [
-            {"loc": "/", "priority": "1.0", "changefreq": "weekly"},
-            {"loc": "/rent", "priority": "0.8", "changefreq": "monthly"},
-            {"loc": "/about", "priority": "0.7", "changefreq": "monthly"},
-            {"loc": "/contact", "priority": "0.7", "changefreq": "monthly"},
-            {"loc": "/blog", "priority": "0.6", "changefreq": "weekly"},
-            {"loc": "/faq", "priority": "0.6", "changefreq": "monthly"},
-        ]
-
-        for page in static_pages:
-            sitemap_content += f'''  <url>
-    <loc>{base_url}{page["loc"]}</loc>
-    <lastmod>{current_date}</lastmod>
-    <changefreq>{page["changefreq"]}</changefreq>
-    <priority>{page["priority"]}</priority>
-  </url>\n'''
-
-        # Category pages
-        for category in categories:
-            category_id, category_name, category_slug = category
-            sitemap_content += f'''  <url>
-    <loc>{base_url}/category/{category_slug}</loc>
-    <lastmod>{current_date}</lastmod>
-    <changefreq>weekly</changefreq>
-    <priority>0.8</priority>
-  </url>\n'''
-
-        # Product pages
-        for product in products:
-            product_id, product_name, product_slug, category_id = product
-            sitemap_content += f'''  <url>
-    <loc>{base_url}/product/{product_slug}</loc>
-    <lastmod>{current_date}</lastmod>
-    <changefreq>monthly</changefreq>
-    <priority>0.6</priority>
-  </url>\n'''
-
-        # Close sitemap
-        sitemap_content += '</urlset>\n'
-
-        # Write to file
-        sitemap_path = Path(__file__).parent.parent / "Frontend" / "public" / "sitemap.xml"
-        with open(sitemap_path, 'w', encoding='utf-8') as f:
-            f.write(sitemap_content)
+        fingerprint = catalog_fingerprint(db, compress)
+        if not force and fingerprint == published_fingerprint(output_dir):
+            print(f"Sitemap is up to date, nothing rewritten: {output_dir / INDEX_NAME}")
+            return True
+
+        # Static pages have no tracked modification time, so no lastmod
+        for page in STATIC_PAGES:
+            writer.add(page["loc"], changefreq=page["changefreq"], priority=page["priority"])
+
+        # A category page changes when the category or any of its products does
+        newest_product = dict(db.execute(
+            select(Product.category_id, func.max(Product.updated_at)).group_by(Product.category_id)
+        ).all())
+        categories = db.execute(
+            select(Category.id, Category.slug, Category.updated_at).order_by(Category.slug)
+        )
+        category_count = 0
+        for category_id, slug, updated_at in categories:
+            lastmod = max(filter(None, (updated_at, newest_product.get(category_id))), default=None)
+            writer.add(f"/category/{slug}", lastmod, "weekly", "0.8")
+            category_count += 1
 
+        products = db.execute(
+            select(Product.slug, Product.updated_at)
+            .order_by(Product.slug)
+            .execution_options(stream_results=True, yield_per=BATCH_SIZE)
+        )
+        product_count = 0
+        for slug, updated_at in products:
+            writer.add(f"/product/{slug}", updated_at, "monthly", "0.6")
+            product_count += 1
+        writer.close()
+
+        index_replaced = _write_if_changed(output_dir / INDEX_NAME, sitemap_index(writer.shards, fingerprint))
+        current = {name for name, _, _ in writer.shards}
+        for stale in output_dir.iterdir():
+            if _SHARD_RE.match(stale.name) and stale.name not in current:
+                stale.unlink()
+
+        replaced = sum(1 for _, _, changed in writer.shards if changed)
         print(f"Sitemap generated successfully with:")
-        print(f"   - {len(static_pages)} static pages")
-        print(f"   - {len(categories)} category pages")
-        print(f"   - {len(products)} product pages")
-        print(f"   - Total: {len(static_pages) + len(categories) + len(products)} URLs")
-        print(f"   - Saved to: {sitemap_path}")
+        print(f"   - {len(STATIC_PAGES)} static pages")
+        print(f"   - {category_count} category pages")
+        print(f"   - {product_count} product pages")
+        print(f"   - Total: {writer.total_urls} URLs in {len(writer.shards)} file(s), "
+              f"{replaced} rewritten{', index rewritten' if index_replaced else ''}")
+        print(f"   - Saved to: {output_dir / INDEX_NAME}")
 
     except Exception as e:
+        writer.abort()
         print(f"Error generating sitemap: {str(e)}")
         return False
     finally:
@@ -100,5 +304,13 @@ def generate_sitemap():
 
     return True
 
+def main():
+    parser = argparse.ArgumentParser(description="Generate the sitemap index and sitemap files")
+    parser.add_argument("--gzip", action="store_true", help="write gzip-compressed sitemap files")
+    parser.add_argument("--force", action="store_true", help="rebuild even if nothing changed")
+    parser.add_argument("--output-dir", default=str(OUTPUT_DIR), help="where to write (default Frontend/public)")
+    args = parser.parse_args()
+    return 0 if generate_sitemap(args.output_dir, args.gzip, args.force) else 1
+
 if __name__ == "__main__":
-    generate_sitemap()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Apply versioned schema migrations (app/migrations/versions) to the configured
+DATABASE_URL, SQLite or PostgreSQL. Run once per deploy, before starting the
+API workers.
+
+    python migrate.py             # apply pending migrations
+    python migrate.py --dry-run   # print the SQL without running it
+    python migrate.py --status    # list applied and pending versions
+"""
+
+import argparse
+import logging
+from pathlib import Path
+
+from dotenv import load_dotenv
+load_dotenv(dotenv_path=Path(__file__).parent.parent / ".env")
+
+from app import migrations
+from app.core.database import get_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--dry-run", action="store_true", help="print the SQL without running it")
+    parser.add_argument("--status", action="store_true", help="list applied and pending migrations")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    engine = get_engine()
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+
+    if args.status:
+        applied = migrations.applied_versions(engine)
+        for migration in migrations.discover():
+            mark = "✓" if migration.version in applied else " "
+            print(f"  [{mark}] {migration.version:04d} {migration.name}: {migration.description}")
+        return
+
+    applied = migrations.upgrade(engine, dry_run=args.dry_run)
+    if not applied:
+        print("✓ Schema is up to date")
+    elif args.dry_run:
+        print(f"Dry run: {len(applied)} migration(s) pending, nothing was changed")
+    else:
+        print(f"✅ Applied {len(applied)} migration(s)")
+
+
+if __name__ == "__main__":
+    main()
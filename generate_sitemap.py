@@ -2,6 +2,7 @@
 """
 Sitemap Generator Runner
 Runs the sitemap generator from the backend directory
+(arguments such as --gzip and --force are passed through)
 """
 import subprocess
 import sys
@@ -19,7 +20,7 @@ def main():
     try:
         # Run the sitemap generator
         result = subprocess.run([
-            sys.executable, str(sitemap_script)
+            sys.executable, str(sitemap_script), *sys.argv[1:]
         ], cwd=str(backend_dir), capture_output=True, text=True)
 
         print(result.stdout)
@@ -1,9 +1,30 @@
 """
 Update product information from Product info text files
+
+Incremental: a manifest records each file's size, mtime and content hash, so
+only new or edited files are parsed on the next run. Entries are kept per
+database (DATABASE_URL without its password, hashed), so pointing the script
+at a fresh or different database applies every file again. Changed files are
+parsed in a process pool once there are at least PRODUCT_INFO_PARALLEL_THRESHOLD
+of them (default 32), their products are loaded with one query, and every
+changed column is written in one batched update and one commit. A report of
+what changed is printed at the end.
+
+    python update_products_from_files.py              # apply changed files
+    python update_products_from_files.py --dry-run    # report only
+    python update_products_from_files.py --force      # ignore the manifest
+    python update_products_from_files.py --parallel-threshold 1   # always use the pool
+
+Run `python backend/migrate.py` first on a new database.
 """
+import argparse
+import hashlib
+import json
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import os
 
 # Load environment variables from .env file
 from dotenv import load_dotenv
@@ -11,181 +32,220 @@ load_dotenv()
 
 sys.path.insert(0, str(Path(__file__).parent / "backend"))
 
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal, get_engine
+from app.models.change import allocate_change_seqs
 from app.models.product import Product
-from app.models.category import Category
-
-def parse_product_file(file_path):
-    """Parse a product text file and extract information."""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except UnicodeDecodeError:
-        # Try with latin-1 encoding for files with special characters
-        with open(file_path, 'r', encoding='latin-1') as f:
-            content = f.read()
-
-    lines = content.split('\n')
-    product_info = {}
-
-    current_section = None
-    section_content = []
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-
-        # Check for section headers
-        if line in ['Customer-Friendly Short Description', 'Detailed Product Information', 'Key Features:', 'SEO Meta Title', 'SEO Meta Description', 'Categories', 'SEO Tags (80-90)', 'Mumbai Posh-Area Keywords (80-90)']:
-            # Save previous section
-            if current_section and section_content:
-                if current_section == 'Key Features:':
-                    # Convert to bullet points
-                    product_info['key_features'] = '\n'.join(f'• {item.strip("- •")}' for item in section_content if item.strip())
-                elif current_section == 'SEO Tags (80-90)':
-                    product_info['seo_tags'] = ', '.join(item.strip() for item in section_content if item.strip())
-                elif current_section == 'Mumbai Posh-Area Keywords (80-90)':
-                    product_info['mumbai_keywords'] = ', '.join(item.strip() for item in section_content if item.strip())
-                else:
-                    product_info[current_section.lower().replace(' ', '_').replace('-', '_')] = '\n'.join(section_content).strip()
-
-            current_section = line
-            section_content = []
-        elif current_section:
-            section_content.append(line)
-        elif not product_info.get('name'):
-            # First line is the product name
-            product_info['name'] = line
-
-    # Save the last section
-    if current_section and section_content:
-        if current_section == 'Key Features:':
-            product_info['key_features'] = '\n'.join(f'• {item.strip("- •")}' for item in section_content if item.strip())
-        elif current_section == 'SEO Tags (80-90)':
-            product_info['seo_tags'] = ', '.join(item.strip() for item in section_content if item.strip())
-        elif current_section == 'Mumbai Posh-Area Keywords (80-90)':
-            product_info['mumbai_keywords'] = ', '.join(item.strip() for item in section_content if item.strip())
-        else:
-            product_info[current_section.lower().replace(' ', '_').replace('-', '_')] = '\n'.join(section_content).strip()
-
-    return product_info
-
-def update_products_from_files():
-    """Update products in database with information from text files."""
-
-    # Ensure tables exist
-    Base.metadata.create_all(bind=engine)
-    db = SessionLocal()
-
+from app.services.catalog import mark_catalog_dirty
+from app.services.product_info import parse_product_file
+
+PRODUCT_INFO_DIR = Path(__file__).parent / "Product info"
+MANIFEST_PATH = Path(__file__).parent / ".product_manifest.json"
+
+# Parsing takes tens of microseconds per file (see backend/bench_product_info.py),
+# so a pool only pays for itself on large batches; the default still lets a
+# --force run over the whole corpus (about 40 files) use it
+PARALLEL_THRESHOLD = int(os.getenv("PRODUCT_INFO_PARALLEL_THRESHOLD", "32"))
+
+# Product names (as stored in the database) to their info files. Files not
+# listed here are matched on the product name in their first line.
+PRODUCT_MAPPING = {
+    "Bubble Air Bed Mattress": "Product 7.txt",
+    "Nayome SWDN Premium Air Bed Mattress": "Product 8.txt",
+    "Tubular Air Bed Mattress": "Product 9.txt",
+    "BMC Auto CPAP Machine": "Product 15.txt",
+    "Philips DreamStation Auto CPAP": "Product 16.txt",
+    "ResMed AirSense 10 AutoSet CPAP": "Product 17.txt",
+    "BiPAP A40 Pro Machine": "Product 18.txt",
+    "BMC BiPAP YT30 Machine": "Product 19.txt",
+    "Philips DreamStation Auto BiPAP": "Product 20.txt",
+    "Philips DreamStation BiPAP AVAPS": "Product 21.txt",
+    "Philips DreamStation BiPAP ST": "Product 22.txt",
+    "ResMed Lumis 100": "Product 23.txt",
+    "ResMed Lumis 150": "Product 24.txt",
+    "ResMed Stellar 150": "Product 25.txt",
+    "DVT Pump": "Product 35.txt",
+    "Feeding Pump": "Product 37.txt",
+    "Infusion Pump": "Product 36.txt",
+    "Lymph Pump": "Product 38.txt",
+    "Exclusive 5-Function Automatic Bed": "Product 6.txt",
+    "Exclusive Automatic Bed 4-Section": "Product 5.txt",
+    "Exclusive Full Fowler Bed": "Product 1.txt",
+    "Motor Recliner Hospital Bed Black": "Product 3.txt",
+    "Motor Recliner Hospital Bed Blue": "Product 4.txt",
+    "Premium 5-Function Patient Bed": "Product 2.txt",
+    "JAY 10-10 B 10 LPM Oxygen Concentrator": "Product 11.txt",
+    "Oxy Med Portable Oxygen Concentrator": "Product 14.txt",
+    "Philips Everflo 5 LPM Oxygen Concentrator": "Product 10.txt",
+    "Portable Oxygen Concentrator Philips Simply Go Mini": "Product 13.txt",
+    "Portable Oxygen Concentrator Philips Simply Go": "Product 12.txt",
+    "Multi-Para Five-Para Patient Monitor": "Product 31.txt",
+    "Three-Para Patient Monitor": "Product 32.txt",
+    "Manual Suction Machine": "Product 43.txt",
+    "Suction Machine Double Jar": "Product 41.txt",
+    "Suction Machine Single Jar": "Product 40.txt",
+    "Suction Machine Single Jar with Battery Backup": "Product 42.txt",
+    "Syringe Pump": "Product 39.txt",
+    "Phillips Trilogy 100 Ventilator": "Product 29.txt",
+    "Phillips Trilogy EVO Ventilator": "Product 26.txt",
+    "ResMed Astral 150 Ventilator": "Product 27.txt",
+    "RV-200 Ventilator": "Product 28.txt",
+    "Shorya Ventilator": "Product 30.txt",
+}
+FILE_PRODUCTS = {file_name: name for name, file_name in PRODUCT_MAPPING.items()}
+
+def product_fields(info):
+    """Column values for a product from its parsed info file."""
+    fields = {}
+    if info.description:
+        fields['description'] = info.description
+
+    # Create comprehensive specifications
+    specs_parts = []
+    if info.details:
+        specs_parts.append(f"**Detailed Information:**\n{info.details}")
+    if info.key_features:
+        specs_parts.append(f"**Key Features:**\n{info.key_features_text()}")
+    if info.categories:
+        specs_parts.append(f"**Categories:** {info.categories}")
+    fields['specifications'] = '\n\n'.join(specs_parts) if specs_parts else "Contact for detailed specifications"
+
+    # SEO metadata; tags and area keywords also feed the full-text search index
+    if info.seo_meta_title:
+        fields['seo_meta_title'] = info.seo_meta_title
+    if info.seo_meta_description:
+        fields['seo_meta_description'] = info.seo_meta_description
+    if info.seo_tags:
+        fields['seo_tags'] = info.seo_tags
+    if info.mumbai_keywords:
+        fields['mumbai_keywords'] = info.mumbai_keywords
+    return fields
+
+def file_digest(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def database_key():
+    """Manifest section for the configured database, without writing its URL to disk."""
+    url = get_engine().url.render_as_string(hide_password=True)
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=8).hexdigest()
+
+def read_manifests(path=MANIFEST_PATH):
     try:
-        # Mapping of product names to file numbers (based on the database order)
-        product_mapping = {
-            "Bubble Air Bed Mattress": "Product 7.txt",
-            "Nayome SWDN Premium Air Bed Mattress": "Product 8.txt",
-            "Tubular Air Bed Mattress": "Product 9.txt",
-            "BMC Auto CPAP Machine": "Product 15.txt",
-            "Philips DreamStation Auto CPAP": "Product 16.txt",
-            "ResMed AirSense 10 AutoSet CPAP": "Product 17.txt",
-            "BiPAP A40 Pro Machine": "Product 18.txt",
-            "BMC BiPAP YT30 Machine": "Product 19.txt",
-            "Philips DreamStation Auto BiPAP": "Product 20.txt",
-            "Philips DreamStation BiPAP AVAPS": "Product 21.txt",
-            "Philips DreamStation BiPAP ST": "Product 22.txt",
-            "ResMed Lumis 100": "Product 23.txt",
-            "ResMed Lumis 150": "Product 24.txt",
-            "ResMed Stellar 150": "Product 25.txt",
-            "DVT Pump": "Product 35.txt",
-            "Feeding Pump": "Product 37.txt",
-            "Infusion Pump": "Product 36.txt",
-            "Lymph Pump": "Product 38.txt",
-            "Exclusive 5-Function Automatic Bed": "Product 6.txt",
-            "Exclusive Automatic Bed 4-Section": "Product 5.txt",
-            "Exclusive Full Fowler Bed": "Product 1.txt",
-            "Motor Recliner Hospital Bed Black": "Product 3.txt",
-            "Motor Recliner Hospital Bed Blue": "Product 4.txt",
-            "Premium 5-Function Patient Bed": "Product 2.txt",
-            "JAY 10-10 B 10 LPM Oxygen Concentrator": "Product 11.txt",
-            "Oxy Med Portable Oxygen Concentrator": "Product 14.txt",
-            "Philips Everflo 5 LPM Oxygen Concentrator": "Product 10.txt",
-            "Portable Oxygen Concentrator Philips Simply Go Mini": "Product 13.txt",
-            "Portable Oxygen Concentrator Philips Simply Go": "Product 12.txt",
-            "Multi-Para Five-Para Patient Monitor": "Product 31.txt",
-            "Three-Para Patient Monitor": "Product 32.txt",
-            "Manual Suction Machine": "Product 43.txt",
-            "Suction Machine Double Jar": "Product 41.txt",
-            "Suction Machine Single Jar": "Product 40.txt",
-            "Suction Machine Single Jar with Battery Backup": "Product 42.txt",
-            "Syringe Pump": "Product 39.txt",
-            "Phillips Trilogy 100 Ventilator": "Product 29.txt",
-            "Phillips Trilogy EVO Ventilator": "Product 26.txt",
-            "ResMed Astral 150 Ventilator": "Product 27.txt",
-            "RV-200 Ventilator": "Product 28.txt",
-            "Shorya Ventilator": "Product 30.txt",
+        with open(path, 'r', encoding='utf-8') as f:
+            manifests = json.load(f)
+    except FileNotFoundError:
+        return {}
+    # Manifests from before per-database sections are dropped: every file is applied once more
+    return manifests.get("databases", {})
+
+def load_manifest(database, path=MANIFEST_PATH):
+    return read_manifests(path).get(database, {})
+
+def save_manifest(manifest, database, path=MANIFEST_PATH):
+    manifests = read_manifests(path)
+    manifests[database] = manifest
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"databases": manifests}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def scan_files(manifest, force=False):
+    """
+    Split the info files into changed and unchanged ones.
+    Returns ({file name: manifest entry} for changed files, unchanged file names).
+    Files are only hashed when their size or mtime differs from the manifest.
+    """
+    changed, unchanged = {}, []
+    for file_path in sorted(PRODUCT_INFO_DIR.glob("*.txt")):
+        stat = file_path.stat()
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "product": FILE_PRODUCTS.get(file_path.name),
         }
+        previous = manifest.get(file_path.name)
+        if not force and previous and previous.get("product") == entry["product"]:
+            if (previous["size"], previous["mtime_ns"]) == (entry["size"], entry["mtime_ns"]):
+                unchanged.append(file_path.name)
+                continue
+            entry["hash"] = file_digest(file_path)
+            if previous["hash"] == entry["hash"]:
+                # Touched but not edited: remember the new mtime, skip parsing
+                manifest[file_path.name] = entry
+                unchanged.append(file_path.name)
+                continue
+        entry.setdefault("hash", file_digest(file_path))
+        changed[file_path.name] = entry
+    return changed, unchanged
+
+def parse_files(file_names, workers=None, threshold=PARALLEL_THRESHOLD):
+    """Parse info files, in a process pool when there are at least `threshold` of them."""
+    paths = [PRODUCT_INFO_DIR / name for name in file_names]
+    if len(paths) < threshold or workers == 1:
+        return dict(zip(file_names, map(parse_product_file, paths)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(paths) // ((workers or os.cpu_count() or 1) * 4))
+        return dict(zip(file_names, pool.map(parse_product_file, paths, chunksize=chunksize)))
+
+def update_products_from_files(force=False, dry_run=False, workers=None, parallel_threshold=PARALLEL_THRESHOLD):
+    """Update products in database with information from changed text files."""
+    started = time.perf_counter()
+    database = database_key()
+    manifest = {} if force else load_manifest(database)
+    changed, unchanged = scan_files(manifest, force)
+    parsed = parse_files(list(changed), workers, parallel_threshold)
+
+    targets = {
+        file_name: changed[file_name]["product"] or info.name
+        for file_name, info in parsed.items()
+    }
+    missing_files = sorted(
+        file_name for file_name in PRODUCT_MAPPING.values()
+        if not (PRODUCT_INFO_DIR / file_name).exists()
+    )
 
-        product_info_dir = Path(__file__).parent / "Product info"
-
-        for product_name, file_name in product_mapping.items():
-            file_path = product_info_dir / file_name
-
-            if file_path.exists():
-                print(f"Processing {file_name} for {product_name}")
-
-                # Parse the product file
-                product_data = parse_product_file(file_path)
-
-                # Find the product in database
-                product = db.query(Product).filter(Product.name == product_name).first()
-
-                if product:
-                    # Update product with detailed information
-                    if 'customer_friendly_short_description' in product_data:
-                        product.description = product_data['customer_friendly_short_description']
-
-                    # Create comprehensive specifications
-                    specs_parts = []
-
-                    if 'detailed_product_information' in product_data:
-                        specs_parts.append(f"**Detailed Information:**\n{product_data['detailed_product_information']}")
-
-                    if 'key_features' in product_data:
-                        specs_parts.append(f"**Key Features:**\n{product_data['key_features']}")
-
-                    if 'categories' in product_data:
-                        specs_parts.append(f"**Categories:** {product_data['categories']}")
-
-                    if specs_parts:
-                        product.specifications = '\n\n'.join(specs_parts)
-                    else:
-                        product.specifications = "Contact for detailed specifications"
-
-                    # Store SEO information as additional metadata (could be used for meta tags)
-                    if 'seo_meta_title' in product_data:
-                        product.seo_meta_title = product_data['seo_meta_title']
-                        print(f"    SEO Title: {product_data['seo_meta_title']}")
-
-                    if 'seo_meta_description' in product_data:
-                        product.seo_meta_description = product_data['seo_meta_description']
-                        print(f"    SEO Description: {product_data['seo_meta_description'][:100]}...")
-
-                    print(f"  ✓ Updated {product_name}")
-                else:
-                    print(f"  ✗ Product not found: {product_name}")
+    db = SessionLocal()
+    report = {"updated": {}, "no_changes": [], "not_found": []}
+    try:
+        names = {name for name in targets.values() if name}
+        products = {}
+        if names:
+            # One query for every product a changed file points at
+            products = {p.name: p for p in db.query(Product).filter(Product.name.in_(names))}
+
+        updates = []
+        for file_name, product_name in targets.items():
+            product = products.get(product_name)
+            if product is None:
+                report["not_found"].append((file_name, product_name))
+                continue
+            fields = product_fields(parsed[file_name])
+            diff = {
+                field: value for field, value in fields.items()
+                if getattr(product, field) != value
+            }
+            if diff:
+                updates.append({"id": product.id, **diff})
+                report["updated"][file_name] = (product_name, sorted(diff))
             else:
-                print(f"  ✗ File not found: {file_path}")
-
-        db.commit()
-        print("\n✓ All products updated successfully!")
-
-        # Verify update
-        total_products = db.query(Product).count()
-        products_with_specs = db.query(Product).filter(Product.specifications != "Contact for detailed specifications").count()
-
-        print(f"\nUpdate Summary:")
-        print(f"  - Total products: {total_products}")
-        print(f"  - Products with detailed specs: {products_with_specs}")
-
+                report["no_changes"].append(file_name)
+
+        if updates and not dry_run:
+            # Bulk updates skip before_flush; number the rows in one round trip
+            for update, seq in zip(updates, allocate_change_seqs(db.connection(), len(updates))):
+                update["change_seq"] = seq
+            db.bulk_update_mappings(Product, updates)
+            # Bulk updates bypass the unit of work; rebuild the catalog on commit
+            mark_catalog_dirty(db)
+            db.commit()
+
+        if not dry_run:
+            # Record only files that reached the database, so unmatched files are retried
+            not_found = {file_name for file_name, _ in report["not_found"]}
+            for file_name, entry in changed.items():
+                if file_name not in not_found:
+                    manifest[file_name] = entry
+            save_manifest(manifest, database)
     except Exception as e:
         print(f"✗ Error updating products: {str(e)}")
         db.rollback()
@@ -193,5 +253,41 @@ def update_products_from_files():
     finally:
         db.close()
 
+    print_report(report, changed, unchanged, missing_files, dry_run, time.perf_counter() - started)
+    return report
+
+def print_report(report, changed, unchanged, missing_files, dry_run, elapsed):
+    prefix = "Would update" if dry_run else "Updated"
+    for file_name, (product_name, fields) in sorted(report["updated"].items()):
+        print(f"  ✓ {prefix} {product_name} from {file_name}: {', '.join(fields)}")
+    for file_name, product_name in sorted(report["not_found"]):
+        print(f"  ✗ Product not found for {file_name}: {product_name or '(no name line)'}")
+    for file_name in missing_files:
+        print(f"  ✗ File not found: {PRODUCT_INFO_DIR / file_name}")
+
+    print(f"\nUpdate Summary{' (dry run)' if dry_run else ''}:")
+    print(f"  - Files scanned: {len(changed) + len(unchanged)}")
+    print(f"  - Unchanged since last run (skipped): {len(unchanged)}")
+    print(f"  - Parsed: {len(changed)}")
+    print(f"  - Products {'to update' if dry_run else 'updated'}: {len(report['updated'])}")
+    print(f"  - Already up to date: {len(report['no_changes'])}")
+    print(f"  - Products not found: {len(report['not_found'])}")
+    print(f"  - Took {elapsed:.2f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing them")
+    parser.add_argument("--force", action="store_true", help="re-parse every file, ignoring the manifest")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument(
+        "--parallel-threshold", type=int, default=PARALLEL_THRESHOLD,
+        help=f"parse in a process pool from this many changed files (default: {PARALLEL_THRESHOLD})",
+    )
+    args = parser.parse_args()
+    update_products_from_files(
+        force=args.force, dry_run=args.dry_run, workers=args.workers,
+        parallel_threshold=args.parallel_threshold,
+    )
+
 if __name__ == "__main__":
-    update_products_from_files()
\ No newline at end of file
+    main()